@@ -4,6 +4,7 @@ from tkcalendar import DateEntry
 from PIL import Image, ImageTk
 import os
 import csv
+import fixture_master
 from datetime import date
 
 def load_fixture_accessory_data():
@@ -16,23 +17,8 @@ def load_fixture_accessory_data():
         return {}
 
     try:
-        fixture_accessory_map = {}
-        with open(filepath, mode='r') as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip the header
-            for row in reader:
-                fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row[:7]
-                if fixture_number not in fixture_accessory_map:
-                    fixture_accessory_map[fixture_number] = []
-                fixture_accessory_map[fixture_number].append({
-                    "Accessory Number": acc_num,
-                    "Accessory Name": acc_name,
-                    "Parameter": parameter,
-                    "Specification": specification,
-                    "Inspection Instrument": inspection_instrument
-                })
-        
-        return fixture_accessory_map
+        # Compiled map from the on-disk cache, rebuilt only when the fixture master has changed
+        return fixture_master.load_accessory_map(filepath)
     
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred while loading the data: {str(e)}")
@@ -127,7 +113,7 @@ def submit_data():
     try:
         file_exists = os.path.isfile(save_path)
 
-        with open(save_path, mode='a', newline='') as file:  # Append mode
+        with open(save_path, mode='a', newline='', encoding='utf-8') as file:  # Append mode
             writer = csv.writer(file)
 
             # Write header only if the file does not exist
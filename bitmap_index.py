@@ -0,0 +1,65 @@
+# Set bit positions of every byte value, used to turn a bitmap back into row ids
+BIT_POSITIONS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class BitmapIndex:
+    """Inverted index from a column's values to bitmaps of the row ids holding them.
+
+    Each bitmap is a bytearray that starts at the byte of the value's first row, so values
+    clustered in time (dates, new machines) only cost the span of rows they appear in.
+    Unions and intersections are done on Python ints, which runs in C.
+    """
+
+    def __init__(self):
+        self.bitmaps = {}
+
+    def add(self, key, row_id):
+        """Mark a row as holding a value."""
+        byte = row_id >> 3
+        entry = self.bitmaps.get(key)
+        if entry is None:
+            entry = self.bitmaps[key] = [byte, bytearray(1)]
+        start, bits = entry
+        if len(bits) <= byte - start:
+            bits.extend(bytes(byte - start + 1 - len(bits)))
+        bits[byte - start] |= 1 << (row_id & 7)
+
+    def bitmap(self, key):
+        """Return the bitmap of one value as an int (0 when the value never occurs)."""
+        entry = self.bitmaps.get(key)
+        if entry is None:
+            return 0
+        start, bits = entry
+        return int.from_bytes(bits, 'little') << (start * 8)
+
+    def union(self, keys):
+        """Return the bitmap of the rows holding any of the values."""
+        result = 0
+        for key in keys:
+            result |= self.bitmap(key)
+        return result
+
+
+def bitmap_rows(bitmap):
+    """Return the row ids set in a bitmap, in ascending order."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    rows = []
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index << 3
+            rows.extend(base + bit for bit in BIT_POSITIONS[byte])
+    return rows
+
+
+def rows_bitmap(row_ids):
+    """Return the bitmap with the given row ids set."""
+    row_ids = list(row_ids)
+    bits = bytearray((max(row_ids) >> 3) + 1 if row_ids else 0)
+    for row_id in row_ids:
+        bits[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def all_rows_bitmap(length):
+    """Return a bitmap with the first length rows set."""
+    return (1 << length) - 1
@@ -0,0 +1,119 @@
+import argparse
+import csv
+import glob
+import os
+import time
+
+import pandas as pd
+
+import inspection_store
+
+HEADER = inspection_store.HEADER
+REJECT_HEADER = ["Source File", "Reject Reason"] + HEADER
+REQUIRED_COLUMNS = ["Date", "Fixture No.", "Accessory No."]
+STATUS_ALIASES = {"OK": "OK", "NG": "NG", "NOT OK": "NG", "NOK": "NG", "NOT_OK": "NG"}
+INGEST_CHUNK_ROWS = 50000
+
+
+def parse_dates(values):
+    """Parse mixed date spellings (ISO, DD/MM/YYYY, DD-MM-YYYY) into ISO strings, NaN where invalid."""
+    parsed = pd.to_datetime(values, errors='coerce', format='%Y-%m-%d')
+    # Only non-ISO spellings go through the day-first parser, which would swap month and day of ISO dates
+    rest = parsed.isna() & (values != '')
+    if rest.any():
+        try:
+            parsed[rest] = pd.to_datetime(values[rest], errors='coerce', dayfirst=True, format='mixed')
+        except (TypeError, ValueError):
+            # pandas before 2.0 has no format='mixed' and infers per element instead
+            parsed[rest] = pd.to_datetime(values[rest], errors='coerce', dayfirst=True)
+    return parsed.dt.strftime('%Y-%m-%d')
+
+
+def validate_rows(rows):
+    """Split raw CSV rows into normalized rows to store and (raw_row, reason) rejects."""
+    if not rows:
+        return [], []
+    width = len(HEADER)
+    frame = pd.DataFrame([row[:width] + [''] * (width - len(row)) for row in rows], columns=HEADER, dtype=str)
+    frame = frame.apply(lambda column: column.str.strip())
+    reasons = pd.Series('', index=frame.index)
+
+    # Old exports carry the submission status in a 13th field; it only fills a blank Status
+    lengths = pd.Series([len(row) for row in rows], index=frame.index)
+    legacy_status = pd.Series([row[width].strip() if len(row) > width else '' for row in rows], index=frame.index)
+    frame["Status"] = frame["Status"].where(frame["Status"] != '', legacy_status)
+    reasons[(lengths < width) | (lengths > width + 1)] = "wrong number of fields"
+
+    for column in REQUIRED_COLUMNS:
+        reasons[(reasons == '') & (frame[column] == '')] = f"missing {column}"
+
+    dates = parse_dates(frame["Date"])
+    reasons[(reasons == '') & dates.isna()] = "invalid Date"
+    frame["Date"] = dates
+
+    statuses = frame["Status"].str.upper().map(STATUS_ALIASES)
+    reasons[(reasons == '') & statuses.isna()] = "invalid Status"
+    frame["Status"] = statuses
+
+    accepted = reasons == ''
+    rejected = [(rows[index], reasons[index]) for index in reasons.index[~accepted]]
+    return frame[accepted].values.tolist(), rejected
+
+
+def expand_paths(paths):
+    """Expand directories and glob patterns (which may match directories) into a sorted list of CSV files."""
+    found = []
+    for path in paths:
+        for match in glob.glob(path) or [path]:
+            if os.path.isdir(match):
+                found.extend(glob.glob(os.path.join(match, "*.csv")))
+            else:
+                found.append(match)
+    return sorted(set(found))
+
+
+def ingest(paths, store_path=inspection_store.STORE_PATH, reject_path="rejected_rows.csv", chunk_rows=INGEST_CHUNK_ROWS):
+    """Validate and load CSV files into the inspection store; return (loaded, rejected) counts."""
+    store = inspection_store.open_store(store_path)
+    loaded = rejected = 0
+    reject_exists = os.path.isfile(reject_path) and os.path.getsize(reject_path) > 0
+    with open(reject_path, mode='a', newline='', encoding='utf-8') as reject_file:
+        reject_writer = csv.writer(reject_file)
+        if not reject_exists:
+            reject_writer.writerow(REJECT_HEADER)
+        for filepath in expand_paths(paths):
+            file_rejected = 0
+
+            def transform(rows):
+                nonlocal file_rejected
+                good, bad = validate_rows(rows)
+                for raw_row, reason in bad:
+                    reject_writer.writerow([filepath, reason] + list(raw_row))
+                file_rejected += len(bad)
+                return good
+
+            started = time.perf_counter()
+            # Each chunk is committed together with the file offset, so an interrupted ingest resumes where it stopped
+            count = inspection_store.import_csv(store, filepath, transform=transform, chunk_rows=chunk_rows)
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            print(f"{filepath}: {count} rows loaded, {file_rejected} rejected ({count / elapsed:,.0f} rows/s)")
+            loaded += count
+            rejected += file_rejected
+    store.close()
+    return loaded, rejected
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Bulk-load inspection CSV files into the inspection store.")
+    parser.add_argument("paths", nargs="+", help="CSV files, directories or glob patterns to ingest")
+    parser.add_argument("--store", default=inspection_store.STORE_PATH, help="SQLite inspection store to load into")
+    parser.add_argument("--rejects", default="rejected_rows.csv", help="CSV file that receives rejected rows")
+    parser.add_argument("--chunk-rows", type=int, default=INGEST_CHUNK_ROWS, help="rows validated and committed per chunk")
+    args = parser.parse_args()
+    loaded, rejected = ingest(args.paths, args.store, args.rejects, args.chunk_rows)
+    print(f"Done: {loaded} rows loaded, {rejected} rejected (see {args.rejects}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import array
+import csv
+import io
+import locale
+import mmap
+import os
+
+INDEX_MAGIC = b"CSVIDX1\n"
+PREFIX_SIZE = 256
+# Station files are written in UTF-8; rows from before that are in the locale encoding
+LEGACY_ENCODING = locale.getpreferredencoding(False)
+
+
+def _decode_row(data):
+    """Decode CSV bytes as UTF-8, falling back to the locale encoding older rows were written in."""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode(LEGACY_ENCODING, errors='replace')
+
+
+class MappedCSV:
+    """Memory-mapped CSV file with a row-offset index, parsing rows only when they are read.
+
+    offsets[i] is the byte offset where row i starts and offsets[-1] is the end of the last
+    complete row. The index is saved next to the file (<file>.idx) so later opens only scan
+    bytes appended since the previous open.
+    """
+
+    def __init__(self, filepath, persist_index=True):
+        self.filepath = filepath
+        self.index_path = filepath + ".idx"
+        self.persist_index = persist_index
+        self.file = open(filepath, mode='rb')
+        self.map = None
+        self.offsets = array.array('Q', [0])
+        self._load_index()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def close(self):
+        """Release the memory map and the file handle."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _prefix(self):
+        """Return the first bytes of the file, used to tell whether a saved index still matches."""
+        self.file.seek(0)
+        return self.file.read(PREFIX_SIZE)
+
+    def _load_index(self):
+        """Load the saved index when it belongs to the current file contents."""
+        if not self.persist_index or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, mode='rb') as file:
+                if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    return
+                prefix_length = int.from_bytes(file.read(2), 'little')
+                prefix = file.read(prefix_length)
+                offsets = array.array('Q')
+                offsets.frombytes(file.read())
+        except (OSError, ValueError):
+            return
+        size = os.fstat(self.file.fileno()).st_size
+        if offsets and offsets[0] == 0 and offsets[-1] <= size and self._prefix()[:prefix_length] == prefix:
+            self.offsets = offsets
+
+    def _save_index(self):
+        """Atomically write the index next to the CSV file."""
+        prefix = self._prefix()[:min(PREFIX_SIZE, self.offsets[-1])]
+        temp_path = self.index_path + ".tmp"
+        try:
+            with open(temp_path, mode='wb') as file:
+                file.write(INDEX_MAGIC)
+                file.write(len(prefix).to_bytes(2, 'little'))
+                file.write(prefix)
+                self.offsets.tofile(file)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # The index is only a cache; a read-only folder just means the next open scans again
+            pass
+
+    def refresh(self):
+        """Map the current file size and index any complete rows appended since the last scan."""
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.offsets[-1]:
+            self.offsets = array.array('Q', [0])
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if size == 0:
+            return
+        self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+        start = position = self.offsets[-1]
+        in_quotes = False
+        while True:
+            newline = self.map.find(b'\n', position)
+            if newline < 0:
+                break
+            # A newline inside a quoted field does not end the row; doubled quotes keep the parity right
+            if self.map[position:newline].count(b'"') % 2:
+                in_quotes = not in_quotes
+            position = newline + 1
+            if not in_quotes:
+                self.offsets.append(position)
+        if self.persist_index and start != self.offsets[-1]:
+            self._save_index()
+
+    def find_row(self, offset):
+        """Return the number of the first row starting at or after a byte offset."""
+        low, high = 0, len(self.offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.offsets[middle] < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def rows(self, start, stop):
+        """Parse and return rows start..stop-1."""
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        try:
+            text = self.map[self.offsets[start]:self.offsets[stop]].decode('utf-8')
+        except UnicodeDecodeError:
+            # A file appended to before and after the switch to UTF-8 mixes both, so decode row by row
+            text = ''.join(_decode_row(self.map[self.offsets[index]:self.offsets[index + 1]])
+                           for index in range(start, stop))
+        return list(csv.reader(io.StringIO(text, newline='')))
+
+    def row(self, index):
+        """Parse and return a single row."""
+        return self.rows(index, index + 1)[0]
@@ -0,0 +1,50 @@
+import inspection_store
+
+
+class DistinctValueCache:
+    """Distinct values and their counts per (fixture, column) for the viewer's comboboxes and menus.
+
+    Counts are loaded once per key from the store's value_counts table and then kept up to
+    date from appended rows, so the dropdowns never scan inspection rows. A fixture of None
+    means all fixtures.
+    """
+
+    def __init__(self, store, columns=inspection_store.COUNTED_COLUMNS):
+        self.store = store
+        self.columns = [(column_name, inspection_store.HEADER.index(column_name)) for column_name in columns]
+        self.fixture_index = inspection_store.HEADER.index("Fixture No.")
+        self.counts = {}
+        self.sorted_values = {}
+
+    def counts_for(self, fixture_number, column_name):
+        """Return {value: count} for one fixture (or all fixtures) and column."""
+        key = (fixture_number or None, column_name)
+        if key not in self.counts:
+            self.counts[key] = dict(inspection_store.value_counts(self.store, column_name, fixture_number))
+        return self.counts[key]
+
+    def values(self, fixture_number, column_name):
+        """Return the sorted distinct values for one fixture (or all fixtures) and column."""
+        key = (fixture_number or None, column_name)
+        if key not in self.sorted_values:
+            self.sorted_values[key] = sorted(self.counts_for(fixture_number, column_name))
+        return self.sorted_values[key]
+
+    def add_rows(self, rows):
+        """Count newly appended rows into every loaded key they belong to."""
+        for row in rows:
+            for column_name, col_index in self.columns:
+                value = row[col_index]
+                for key in ((row[self.fixture_index], column_name), (None, column_name)):
+                    counts = self.counts.get(key)
+                    if counts is None:
+                        continue
+                    if value not in counts:
+                        counts[value] = 0
+                        self.sorted_values.pop(key, None)
+                    counts[value] += 1
+
+    def invalidate(self):
+        """Forget everything, e.g. after a bulk import."""
+        self.counts.clear()
+        self.sorted_values.clear()
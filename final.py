@@ -1,11 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog,  Menu, BooleanVar
 import os
-import csv
+import itertools
 from tkcalendar import DateEntry
 from datetime import date
-import matplotlib.pyplot as plt
-import pandas as pd
+import inspection_store
+import fixture_master
+import inspection_writer
+import pivot_snapshot
+import pivot_chart
+import tolerance
+import spc_window
+import hotspot_window
+import inspection_query
+import station_loader
+from inspection_table import InspectionTable
+from virtual_tree import VirtualTreeview
+from view_executor import ViewQueryExecutor
+from distinct_cache import DistinctValueCache
+
+# How often the record viewer checks the CSV files for newly appended rows
+FOLLOW_INTERVAL_MS = 2000
+# Rows loaded between cancellation checks while a view query runs in the background
+CANCEL_CHECK_ROWS = 1000
+# Columns the viewer can sort by walking a sorted permutation instead of re-sorting
+SORT_COLUMNS = ["Date", "Machine No.", "Fixture No.", "Accessory No."]
+# Station CSV files, folders or glob patterns merged into the viewer at start-up
+STATION_PATHS = [os.path.join(os.path.dirname(__file__), "All_Accessories_Data.csv")]
 
 # Functionality 1: Manage Fixtures & Accessories
 def run_functionality_1():
@@ -24,31 +45,21 @@ def run_functionality_1():
         accessory_entries.append((num_entry, name_entry))
         add_button.grid(row=accessory_row_counter + 3, column=0, columnspan=4, pady=10, sticky='ew')
 
-    def save_data_to_csv(accessory_data, filename="fixture_data.csv", update_existing=False):
+    def save_data_to_csv(accessory_data, filename="fixture_data.csv"):
         """Save the accessory data to a CSV file with the specified format."""
         filepath = os.path.join(os.path.expanduser("~"), "Desktop", filename)
         try:
-            file_exists = os.path.isfile(filepath)
-            existing_data = []
-            if update_existing and file_exists:
-                with open(filepath, mode='r') as file:
-                    reader = csv.reader(file)
-                    existing_data = list(reader)
-            with open(filepath, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                if not file_exists:
-                    writer.writerow(["Fixture Number", "Fixture Name", "Accessory Name", "Accessory Number", "Parameter", "Specification", "Inspection Instrument"])
-                if update_existing:
-                    for row in existing_data:
-                        if row and row[0] != accessory_data[0]['Fixture Number']:
-                            writer.writerow(row)
-                for accessory in accessory_data:
-                    fixture_number = accessory.get('Fixture Number', fixture_entry.get())
-                    fixture_name = accessory.get('Fixture Name', fixture_name_entry.get())
-                    accessory_name = accessory.get('Name')
-                    accessory_number = accessory.get('Number')
-                    for row in accessory['Details']:
-                        writer.writerow([fixture_number, fixture_name, accessory_name, accessory_number] + list(row[3:]))
+            # Only the fixtures being saved are appended to the master log; other fixtures are not rewritten
+            rows_by_fixture = {}
+            for accessory in accessory_data:
+                fixture_number = accessory.get('Fixture Number', fixture_entry.get())
+                fixture_name = accessory.get('Fixture Name', fixture_name_entry.get())
+                accessory_name = accessory.get('Name')
+                accessory_number = accessory.get('Number')
+                fixture_rows = rows_by_fixture.setdefault(fixture_number, [])
+                for row in accessory['Details']:
+                    fixture_rows.append([fixture_number, fixture_name, accessory_name, accessory_number] + list(row[3:]))
+            fixture_master.save_fixtures(rows_by_fixture, filepath)
             messagebox.showinfo("Save Data", f"Data saved to {filepath}")
         except PermissionError:
             messagebox.showerror("Permission Error", f"Permission denied: Unable to write to {filepath}. Please ensure the file is not open and you have write permissions.")
@@ -118,20 +129,17 @@ def run_functionality_1():
             messagebox.showerror("File Not Found", f"The file {filename} does not exist.")
             return
         try:
-            with open(filepath, mode='r') as file:
-                reader = csv.reader(file)
-                next(reader)
-                for row in reader:
-                    fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row
-                    accessory = next((a for a in accessory_data if a['Number'] == acc_num), None)
-                    if not accessory:
-                        accessory = {'Fixture Number': fixture_number, 'Fixture Name': fixture_name, 'Number': acc_num, 'Name': acc_name, 'Details': []}
-                        accessory_data.append(accessory)
-                    accessory['Details'].append((1, acc_num, acc_name, parameter, specification, inspection_instrument))
-                fixture_entry.delete(0, tk.END)
-                fixture_entry.insert(0, fixture_number)
-                fixture_name_entry.delete(0, tk.END)
-                fixture_name_entry.insert(0, fixture_name)
+            for row in fixture_master.load_rows(filepath):
+                fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row
+                accessory = next((a for a in accessory_data if a['Number'] == acc_num), None)
+                if not accessory:
+                    accessory = {'Fixture Number': fixture_number, 'Fixture Name': fixture_name, 'Number': acc_num, 'Name': acc_name, 'Details': []}
+                    accessory_data.append(accessory)
+                accessory['Details'].append((1, acc_num, acc_name, parameter, specification, inspection_instrument))
+            fixture_entry.delete(0, tk.END)
+            fixture_entry.insert(0, fixture_number)
+            fixture_name_entry.delete(0, tk.END)
+            fixture_name_entry.insert(0, fixture_name)
             open_accessory_details_window()
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while loading the data: {str(e)}")
@@ -174,7 +182,7 @@ def run_functionality_1():
         save_button.pack(pady=10)
         def final_submit():
             save_accessory_details()
-            save_data_to_csv(accessory_data, update_existing=True)
+            save_data_to_csv(accessory_data)
             details_window.destroy()
         submit_button = tk.Button(details_window, text="Final Submit", command=final_submit)
         submit_button.pack(pady=10)
@@ -250,22 +258,8 @@ def run_functionality_2():
             messagebox.showerror("File Not Found", f"The file {filename} does not exist.")
             return {}
         try:
-            fixture_accessory_map = {}
-            with open(filepath, mode='r') as file:
-                reader = csv.reader(file)
-                next(reader)
-                for row in reader:
-                    fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row[:7]
-                    if fixture_number not in fixture_accessory_map:
-                        fixture_accessory_map[fixture_number] = []
-                    fixture_accessory_map[fixture_number].append({
-                        "Accessory Number": acc_num,
-                        "Accessory Name": acc_name,
-                        "Parameter": parameter,
-                        "Specification": specification,
-                        "Inspection Instrument": inspection_instrument
-                    })
-            return fixture_accessory_map
+            # Compiled map from the on-disk cache, rebuilt only when the fixture master has changed
+            return fixture_master.load_accessory_map(filepath)
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while loading the data: {str(e)}")
             return {}
@@ -321,8 +315,16 @@ def run_functionality_2():
             return
         accessory_number = selected_accessory.split(" - ")[0]
         accessory_key = (fixture_number, accessory_number)
+        items = tree.get_children()
+        # Rows still without a Status are judged against their Specification in one pass
+        statuses = tolerance.evaluate([tree.set(item, "Observation") for item in items],
+                                      [tree.set(item, "Specification") for item in items])
+        for item, status in zip(items, statuses):
+            if status and not tree.set(item, "Status"):
+                tree.set(item, column="Status", value=str(status))
+        update_status_button()
         observations = []
-        for row in tree.get_children():
+        for row in items:
             observations.append(tree.item(row)["values"])
         saved_observations[accessory_key] = observations
         messagebox.showinfo("Save Data", "Data saved in TreeView. You can switch to another accessory.")
@@ -339,18 +341,24 @@ def run_functionality_2():
             return
         accessory_number, accessory_name = accessory.split(" - ")
         accessory_key = (fixture_number, accessory_number)
-        save_path = os.path.join(os.path.expanduser("~"), "Desktop", "All_Accessories_Data.csv")
-        try:
-            file_exists = os.path.isfile(save_path)
-            with open(save_path, mode='a', newline='') as file:
-                writer = csv.writer(file)
-                if not file_exists:
-                    writer.writerow(["Date", "Machine No.", "Operation", "Fixture No.", "Accessory No.", "Accessory Name", "Parameter", "Specification", "Inspection Instrument", "Observation", "Remark", "Status"])
-                for obs in saved_observations.get(accessory_key, []):
-                    writer.writerow([today, machine_no, operation, fixture_number, accessory_number, accessory_name] + list(obs) + [status_button['text']])
-            messagebox.showinfo("Data Submitted", f"Data has been submitted and saved to {save_path}.")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while saving the data: {str(e)}")
+        # Each saved observation already ends in its own Status, so rows match the 12-column header
+        rows = [[today, machine_no, operation, fixture_number, accessory_number, accessory_name] + list(obs)
+                for obs in saved_observations.get(accessory_key, [])]
+
+        def on_written(error):
+            if error is None:
+                messagebox.showinfo("Data Submitted", f"Data has been submitted and saved to {save_path}.")
+            else:
+                messagebox.showerror("Error", f"An error occurred while saving the data: {str(error)}")
+
+        # The background writer appends, fsyncs and imports the rows without blocking the window
+        writer.submit(rows, on_written)
+
+    def close_window():
+        """Finish any queued submissions before closing the window."""
+        writer.close()
+        writer.poll(root)
+        root.destroy()
 
     def get_status_combobox():
         """Create a combobox with 'OK' and 'NG' options."""
@@ -372,6 +380,11 @@ def run_functionality_2():
                 else:
                     tree.set(selected_item, column=column, value=edit_entry.get())
                     edit_entry.destroy()
+                    if tree["columns"][column_index] == "Observation":
+                        # Judge the new observation against the row's Specification when it can be parsed
+                        status_value = tolerance.evaluate_one(tree.set(selected_item, "Observation"), tree.set(selected_item, "Specification"))
+                        if status_value:
+                            tree.set(selected_item, column="Status", value=status_value)
                 update_status_button()
             x, y, width, height = tree.bbox(selected_item, column)
             if column_index == len(tree["columns"]) - 1:
@@ -408,6 +421,10 @@ def run_functionality_2():
     root.title("Measurement Accessory")
     fixture_accessory_map = load_fixture_accessory_data()
     saved_observations = {}
+    save_path = os.path.join(os.path.expanduser("~"), "Desktop", "All_Accessories_Data.csv")
+    writer = inspection_writer.InspectionWriter(save_path)
+    writer.poll(root)
+    root.protocol("WM_DELETE_WINDOW", close_window)
     tk.Label(root, text="Date:").grid(row=0, column=0, padx=10, pady=10, sticky='e')
     date_entry = DateEntry(root, width=12, background='darkblue', foreground='white', borderwidth=2)
     date_entry.grid(row=0, column=1, padx=10, pady=10, sticky='w')
@@ -446,29 +463,65 @@ def run_functionality_2():
 # Functionality 3: View Accessories Data
 def run_functionality_3():
     def load_all_data():
-        """Load all the data from the CSV file."""
-        filename = "All_Accessories_Data.csv"
-        current_directory = os.path.dirname(__file__)
-
-        filepath = os.path.join(current_directory, filename)
+        """Open the inspection store, merging new rows from the station CSV files first."""
+        try:
+            store = inspection_store.open_store()
+            # The configured stations, then every station loaded before; unchanged files are not read
+            station_loader.load_stations(store, STATION_PATHS)
+            station_loader.load_stations(store)
+            if not inspection_store.row_count(store):
+                messagebox.showerror("File Not Found", f"No inspection data found in {', '.join(STATION_PATHS)}.")
+            return inspection_store.STORE_HEADER, store
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while loading the data: {str(e)}")
+            return [], None
 
-        if not os.path.exists(filepath):
-            messagebox.showerror("File Not Found", f"The file {filename} does not exist.")
-            return [], []
+    def import_data():
+        """Import the rows of a chosen CSV file into the inspection store."""
+        nonlocal last_seen_id, table_query
+        filepath = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+        if not filepath:
+            return
         try:
-            with open(filepath, mode='r') as file:
-                reader = csv.reader(file)
-                header = next(reader)
-                data = [row[:len(header)] for row in reader] 
+            imported = inspection_store.import_csv(store, filepath)
+            # Following must not add the imported rows to the view a second time
+            last_seen_id = inspection_store.last_row_id(store)
+            table_query = None
+            distinct_cache.invalidate()
+            fixture_combobox.config(values=distinct_cache.values(None, "Fixture No."))
+            messagebox.showinfo("Import Data", f"Imported {imported} rows from {filepath}.")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while importing the data: {str(e)}")
 
-            
+    def load_station_folder():
+        """Merge every station CSV file of a chosen folder into the inspection store."""
+        nonlocal last_seen_id, table_query
+        directory = filedialog.askdirectory(title="Folder of station CSV files")
+        if not directory:
+            return
+        try:
+            loaded = station_loader.load_stations(store, [directory])
+            # Following must not add the imported rows to the view a second time
+            last_seen_id = inspection_store.last_row_id(store)
+            table_query = None
+            distinct_cache.invalidate()
+            fixture_combobox.config(values=distinct_cache.values(None, "Fixture No."))
+            messagebox.showinfo("Load Stations", f"Loaded {loaded} new rows from the station files in {directory}.")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while loading the station files: {str(e)}")
 
-            return header, data
+    def export_data():
+        """Export the whole inspection store to a CSV file."""
+        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not filepath:
+            return
+        try:
+            inspection_store.export_csv(store, filepath)
+            messagebox.showinfo("Export Data", f"Data exported to {filepath}.")
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while loading the data: {str(e)}")
-            return [], []
+            messagebox.showerror("Error", f"An error occurred while exporting the data: {str(e)}")
 
-    def open_pivot_chart_window(data):
+    def open_pivot_chart_window():
             """Open a new window to create a pivot chart similar to Excel."""
             pivot_window = tk.Toplevel(root)
             pivot_window.title("Pivot Chart")
@@ -492,7 +545,20 @@ def run_functionality_3():
             agg_combobox.grid(row=3, column=1, padx=10, pady=5, sticky="w")
             agg_combobox.current(0)  # Set default to 'count'
 
-            def generate_pivot_chart(data):
+            # Optional date range and status; snapshot parts outside the range are skipped
+            tk.Label(pivot_window, text="From Date (YYYY-MM-DD):").grid(row=4, column=0, padx=10, pady=5, sticky="e")
+            from_date_entry = tk.Entry(pivot_window)
+            from_date_entry.grid(row=4, column=1, padx=10, pady=5, sticky="w")
+
+            tk.Label(pivot_window, text="To Date (YYYY-MM-DD):").grid(row=5, column=0, padx=10, pady=5, sticky="e")
+            to_date_entry = tk.Entry(pivot_window)
+            to_date_entry.grid(row=5, column=1, padx=10, pady=5, sticky="w")
+
+            tk.Label(pivot_window, text="Status:").grid(row=6, column=0, padx=10, pady=5, sticky="e")
+            pivot_status_combobox = ttk.Combobox(pivot_window, values=["", "OK", "NG"], state="readonly")
+            pivot_status_combobox.grid(row=6, column=1, padx=10, pady=5, sticky="w")
+
+            def generate_pivot_chart():
                 """Generate the pivot chart based on the selected options."""
                 row = row_combobox.get()
                 col = col_combobox.get()
@@ -502,161 +568,210 @@ def run_functionality_3():
                 if not row or not col or not value:
                     messagebox.showerror("Selection Error", "Please select a Row, Column, and Value to create the pivot chart.")
                     return
-                df = pd.DataFrame(data,columns=header)
-
-                pivot_table = pd.pivot_table(
-                    df,
-                    values=value,
-                    index=row,
-                    columns=col,
-                    aggfunc=aggfunc,
-                    fill_value=0
-                )
-
-                pivot_table.plot(kind='bar', stacked=True)
-                plt.title(f"Pivot Chart ({row} vs {col} with {value}, {aggfunc})")
-                plt.xlabel(row)
-                plt.ylabel(value)
-                plt.show()
-
-            generate_button = tk.Button(pivot_window, text="Generate Pivot Chart", command=lambda:generate_pivot_chart(data))
-            generate_button.grid(row=4, column=0, columnspan=2, pady=20)
-
-    def filter_data(fixture_number=None, machine_numbers=None, accessory_numbers=None, dates=None):
-        """Filter the data based on the selected criteria."""
-        filtered_data = data
-        if fixture_number:
-            filtered_data = [row for row in filtered_data if row[fixture_col] == fixture_number]
-        if machine_numbers:
-            filtered_data = [row for row in filtered_data if row[machine_col] in machine_numbers]
-        if accessory_numbers:
-            filtered_data = [row for row in filtered_data if row[accessory_col] in accessory_numbers]
-        if dates:
-            filtered_data = [row for row in filtered_data if row[date_col] in dates]
-        return filtered_data
+                try:
+                    query = range_query(from_date_entry.get(), to_date_entry.get(), pivot_status_combobox.get())
+                except ValueError:
+                    messagebox.showerror("Date Error", "Please enter dates as YYYY-MM-DD.")
+                    return
+                # Counts come from the rollup cube, other aggregations from the cached typed columns
+                try:
+                    pivot_table = pivot_snapshot.build_pivot(store, row, col, value, aggfunc, query)
+                except ValueError as e:
+                    messagebox.showerror("Selection Error", str(e))
+                    return
+
+                # Redrawn inside the window; unchanged labels only move the existing bars
+                chart.show(pivot_table, f"Pivot Chart ({row} vs {col} with {value}, {aggfunc})", row, value)
+
+            generate_button = tk.Button(pivot_window, text="Generate Pivot Chart", command=generate_pivot_chart)
+            generate_button.grid(row=7, column=0, columnspan=2, pady=20)
+
+            # One persistent figure per pivot window instead of a new pyplot window per chart
+            chart = pivot_chart.PivotChart(pivot_window)
+            chart.widget.grid(row=0, column=2, rowspan=8, padx=10, pady=10, sticky="nsew")
+            toolbar_frame = tk.Frame(pivot_window)
+            toolbar_frame.grid(row=8, column=2, padx=10, sticky="w")
+            chart.add_toolbar(toolbar_frame).pack(side=tk.LEFT)
+            pivot_window.columnconfigure(2, weight=1)
+            pivot_window.rowconfigure(7, weight=1)
+
+    def range_query(from_date, to_date, status):
+        """Build a query for a YYYY-MM-DD date range and a status; raises ValueError on a bad date."""
+        return inspection_query.Query(
+            *inspection_query.date_range(from_date.strip(), to_date.strip()),
+            inspection_query.status_is(status) if status else None,
+        )
+
+    def fixture_query(selected_fixture, search):
+        """Return the query for the selected fixture's rows within the date range and status filters.
+
+        A text search without a selected fixture covers every fixture.
+        """
+        try:
+            query = range_query(from_date_entry.get(), to_date_entry.get(), status_combobox.get())
+        except ValueError:
+            messagebox.showerror("Date Error", "Please enter dates as YYYY-MM-DD.")
+            query = inspection_query.Query()
+        if selected_fixture or not search:
+            query = query.where(inspection_query.equals("Fixture No.", selected_fixture))
+        return query
+
+    def view_task(query, search, latest, selections, sort):
+        """Return a background task that loads the query's rows (unless already loaded) and matches the selections."""
+        # The loaded table is reused when only the selections or sort changed; follow mode leaves it alone while busy
+        reuse = (table_query is not None and table_query.key() == query.key()
+                 and table_search == search and table_latest == latest)
+        table = fixture_table if reuse else None
+
+        def task(worker_store, token):
+            loaded = table
+            if loaded is None:
+                loaded = InspectionTable(header)
+                if latest:
+                    # Walks the date indexes newest first and stops after the requested rows
+                    rows = inspection_store.iter_sorted(worker_store, "Date", query, descending=True)
+                    if search:
+                        rows = (row for row in rows if inspection_store.text_matches(row, search))
+                    rows = itertools.islice(rows, latest)
+                elif search:
+                    # Trigram index lookup over Parameter, Observation and Remark
+                    rows = inspection_store.iter_search(worker_store, search, query)
+                else:
+                    rows = inspection_store.iter_query(worker_store, query)
+                for count, row in enumerate(rows):
+                    if count % CANCEL_CHECK_ROWS == 0:
+                        token.check()
+                    loaded.append(row)
+            token.check()
+            row_ids = loaded.match(selections)
+            if sort is not None:
+                row_ids = loaded.sorted_ids(row_ids, sort[0], sort[1])
+            return query, search, latest, loaded, row_ids
+        return task
+
+    def show_view(result, error):
+        """Show a finished view query's rows (called on the Tk thread)."""
+        nonlocal fixture_table, table_query, table_search, table_latest
+        if error is not None:
+            messagebox.showerror("Error", f"An error occurred while loading the data: {str(error)}")
+            return
+        query, search, latest, table, row_ids = result
+        fixture_table, table_query, table_search, table_latest = table, query, search, latest
+        update_treeview(table.view(row_ids))
+
+    def show_busy(busy):
+        """Show the busy indicator while a view query is in flight."""
+        if busy and not busy_bar.winfo_ismapped():
+            busy_bar.grid()
+            busy_bar.start(10)
+        elif not busy and busy_bar.winfo_ismapped():
+            busy_bar.stop()
+            busy_bar.grid_remove()
 
     def update_treeview(filtered_data):
-        """Update the TreeView with the filtered data."""
-        tree.delete(*tree.get_children())
-        for row in filtered_data:
-            tree.insert("", tk.END, values=row)
+        """Update the TreeView with the filtered data (any sequence of rows; only the visible page is drawn)."""
+        nonlocal shown_rows
+        shown_rows = filtered_data
+        tree_view.set_rows(filtered_data)
 
     def on_fixture_select(event):
         """Handle the fixture selection and display the related accessories."""
         selected_fixture = fixture_combobox.get()
-        filtered_data = filter_data(fixture_number=selected_fixture)
-        update_treeview(filtered_data)
-        update_comboboxes(filtered_data)
-
-    def update_comboboxes(filtered_data):
-        """Update the comboboxes for Machine No., Accessory No., and Date based on the filtered data."""
-        machine_numbers = sorted(set(row[machine_col] for row in filtered_data))
-        accessory_numbers = sorted(set(row[accessory_col] for row in filtered_data))
-        dates = sorted(set(row[date_col] for row in filtered_data))
-        machine_combobox.config(values=machine_numbers)
-        accessory_combobox.config(values=accessory_numbers)
-        date_combobox.config(values=dates)
-
-    def show_menu(event, column_name, filtered_data):
-        """Show a dropdown menu with checkbuttons for multi-selection."""
-        menu = tk.Menu(root, tearoff=0)
-        if column_name == "Machine No.":
-            options = sorted(set(row[machine_col] for row in filtered_data))
-            current_selection = selected_machines
-        elif column_name == "Accessory No.":
-            options = sorted(set(row[accessory_col] for row in filtered_data))
-            current_selection = selected_accessories
-        elif column_name == "Date":
-            options = sorted(set(row[date_col] for row in filtered_data))
-            current_selection = selected_dates
-        else:
+        column_filter.clear()
+        filter_treeview()
+        update_comboboxes(selected_fixture)
+
+    def on_range_change():
+        """Reload the rows for the new date range, status or search text, keeping the column filters."""
+        if fixture_combobox.get() or search_entry.get().strip():
+            filter_treeview()
+
+    def clear_search():
+        """Clear the search text and show the selected fixture's rows again."""
+        search_entry.delete(0, tk.END)
+        on_range_change()
+
+    def update_comboboxes(selected_fixture):
+        """Update the comboboxes for Machine No., Accessory No., and Date from the distinct-value cache."""
+        machine_numbers = distinct_cache.values(selected_fixture, "Machine No.")
+        accessory_numbers = distinct_cache.values(selected_fixture, "Accessory No.")
+        dates = distinct_cache.values(selected_fixture, "Date")
+        machine_combobox.config(values=[""] + machine_numbers)
+        accessory_combobox.config(values=[""] + accessory_numbers)
+        date_combobox.config(values=[""] + dates)
+        machine_combobox.set("")
+        accessory_combobox.set("")
+        date_combobox.set("")
+
+    def on_filter_combobox_select(col_index, combobox):
+        """Filter the TreeView to the value picked in a Machine No., Accessory No. or Date combobox."""
+        value = combobox.get()
+        column_filter[col_index] = {value} if value else set()
+        filter_treeview()
+
+    def filter_treeview(selections=None):
+        """Filter the TreeView based on the current selections, on the background query thread."""
+        if selections is None:
+            selections = column_filter
+        search = search_entry.get().strip()
+        query = fixture_query(fixture_combobox.get(), search)
+        latest = latest_entry.get().strip()
+        if latest and not (latest.isdigit() and int(latest) > 0):
+            messagebox.showerror("Input Error", "Latest rows must be a positive whole number.")
             return
-        for option in options:
-            var = tk.BooleanVar(value=option in current_selection)
-            def toggle_option(opt=option, var=var):
-                if var.get():
-                    current_selection.add(opt)
-                else:
-                    current_selection.discard(opt)
-                filter_treeview()
-            menu.add_checkbutton(label=option, variable=var, onvalue=True, offvalue=False, command=toggle_option)
-        menu.tk_popup(event.x_root, event.y_root)
-
-    def filter_treeview():
-        """Filter the TreeView based on the current selections."""
-        selected_fixture = fixture_combobox.get()
-        filtered_data = filter_data(
-            fixture_number=selected_fixture,
-            machine_numbers=selected_machines if selected_machines else None,
-            accessory_numbers=selected_accessories if selected_accessories else None,
-            dates=selected_dates if selected_dates else None
-        )
-        update_treeview(filtered_data)
-
-    def on_header_click(event):
-        """Detect header click and show the appropriate menu."""
-        region = tree.identify_region(event.x, event.y)
-        if region == "heading":
-            column = tree.identify_column(event.x)
-            column_index = int(column[1:]) - 1
-            column_name = header[column_index]
-            selected_fixture = fixture_combobox.get()
-            filtered_data = filter_data(fixture_number=selected_fixture)
-            show_menu(event, column_name, filtered_data)
+        # Bitmap union of the ticked values per column, intersected across columns; a newer click cancels this one
+        selections = {col_index: set(values) for col_index, values in selections.items()}
+        view_executor.submit(view_task(query, search, int(latest) if latest else None, selections, sort_state), show_view)
+
+    def sort_view(col, descending):
+        """Sort the TreeView by a column (or clear the sort when col is None) and mark the heading."""
+        nonlocal sort_state
+        sort_state = (col, descending) if col else None
+        for name in header:
+            arrow = (" \u25bc" if descending else " \u25b2") if name == col else ""
+            tree.heading(name, text=name + arrow)
+        filter_treeview()
 
     def show_column_menu(col):
-        """Show a menu for selecting multiple entries when clicking on a TreeView header."""
-        # Only allow the menu for specific columns
-        if col not in {"Date", "Machine No.", "Accessory No."}:
-            return  # Do nothing if the column is not Date, Machine No., or Accessory No.
-
-        selected_fixture = fixture_combobox.get()
-        if not selected_fixture:
-            messagebox.showerror("Selection Error", "Please select a Fixture No. first.")
+        """Show a menu for sorting and selecting multiple entries when clicking on a TreeView header."""
+        # Only allow the menu for the sortable columns
+        if col not in SORT_COLUMNS:
             return
 
-        # Filter the data to only include the selected fixture's entries
-        filtered_data = filter_data(fixture_number=selected_fixture)
-     
+        menu = Menu(root, tearoff=0)
+        menu.add_command(label="Sort Ascending", command=lambda: sort_view(col, False))
+        menu.add_command(label="Sort Descending", command=lambda: sort_view(col, True))
+        if sort_state is not None:
+            menu.add_command(label="Clear Sort", command=lambda: sort_view(None, False))
 
-        # Get unique values from the filtered data for the selected column
-        col_index = header.index(col)
-        unique_values = sorted(set(row[col_index] for row in filtered_data))
+        selected_fixture = fixture_combobox.get()
+        # Value filters exist for Date, Machine No. and Accessory No. once a fixture is selected
+        if col == "Fixture No." or not selected_fixture:
+            unique_values = []
+        else:
+            menu.add_separator()
+            # Get unique values and their counts for the selected column from the distinct-value cache
+            unique_values = distinct_cache.values(selected_fixture, col)
+            counts = distinct_cache.counts_for(selected_fixture, col)
 
-        menu = Menu(root, tearoff=0)
-        selected_values = set()
+        col_index = header.index(col)
+        # Selections are kept per column, so Date, Machine No. and Accessory No. filters combine
+        selected_values = column_filter.setdefault(col_index, set())
 
         def toggle_selection(v, var):
             """Toggle the selection of a value."""
-            if not var.get():
-                print(f"Attempting to add {v} to {selected_values}")
+            # The checkbutton has already flipped var when the command runs
+            if var.get():
                 selected_values.add(v)
-                print(selected_values)
             else:
-                if v in selected_values:
-                    print(f"Attempting to remove {v} from {selected_values}")
-                    selected_values.remove(v)
-                    print(selected_values)
-                else:
-                    print(f"Value {v} not found in {selected_values}")
-            apply_filter()
-
-        def apply_filter():
-            """Apply the filter based on selected values."""
-            # If no values are selected, show all the data for the selected fixture
-            if not selected_values:
-                filtered_data_final = filtered_data
-            else:
-                filtered_data_final = [row for row in filtered_data if row[col_index] in selected_values]
-            
-            # Update the TreeView with the filtered data
-            update_treeview(filtered_data_final)
+                selected_values.discard(v)
+            filter_treeview()
 
         # Create menu items for each unique value in the column
         for value in unique_values:
-            var = BooleanVar()
+            var = BooleanVar(value=value in selected_values)
 
-            menu.add_checkbutton(label=value, variable=var, 
+            menu.add_checkbutton(label=f"{value} ({counts[value]})", variable=var, 
                                 command=lambda v=value, var=var: toggle_selection(v, var))
 
         # Display the menu at the correct location
@@ -666,23 +781,102 @@ def run_functionality_3():
             x = y = 0
         menu.post(tree.winfo_rootx() + x, tree.winfo_rooty() + y + 20)
 
-    def filter_by_column(col, values):
-        """Filter TreeView data based on the selected column and multiple values."""
+    def rescore_history():
+        """Recompute Status from Specification for the selected fixture's filtered rows, or for every row."""
+        nonlocal table_query
         selected_fixture = fixture_combobox.get()
-        filtered_data = filter_data(fixture_number=selected_fixture)
-
-        col_index = header.index(col)
-        filtered_data = [row for row in filtered_data if row[col_index] in values]
-        update_treeview(filtered_data)
+        scope = f"fixture {selected_fixture} (within the date and status filters)" if selected_fixture else "every stored inspection"
+        if not messagebox.askyesno("Re-score Status", f"Recompute Status from Specification for {scope}?"):
+            return
+        query = fixture_query(selected_fixture, "") if selected_fixture else inspection_query.Query()
+        root.config(cursor="watch")
+        root.update_idletasks()
+        try:
+            changed = inspection_store.rescore_status(store, tolerance.evaluate, query)
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while re-scoring: {str(e)}")
+            return
+        finally:
+            root.config(cursor="")
+        # Stored rows changed in place, so the loaded rows and the pivot snapshot are rebuilt
+        pivot_snapshot.clear_snapshot()
+        table_query = None
+        if selected_fixture or search_entry.get().strip():
+            filter_treeview()
+        messagebox.showinfo("Re-score Status", f"{changed} inspections changed Status.")
+
+    def open_spc():
+        """Open the SPC statistics and control charts of the selected fixture."""
+        selected_fixture = fixture_combobox.get()
+        if not selected_fixture:
+            messagebox.showerror("Selection Error", "Please select a Fixture No. first.")
+            return
+        spc_window.open_spc_window(root, store, selected_fixture)
+
+    def open_hotspots():
+        """Open the approximate distinct counts and NG hotspots of the whole plant."""
+        hotspot_window.open_hotspot_window(root, store)
+
+    def follow_tail():
+        """Import rows appended to the followed CSV files and add them to the current view."""
+        nonlocal last_seen_id, table_query
+        # While a view query runs the loaded table belongs to it, so new rows wait for the next tick
+        if follow_var.get() and not view_executor.busy():
+            try:
+                station_loader.load_stations(store)
+                new_rows, last_seen_id = inspection_store.fetch_new_rows(store, last_seen_id)
+            except Exception as e:
+                # Following stops so the error is reported once rather than on every tick
+                follow_var.set(False)
+                messagebox.showerror("Follow New Records", f"Could not read new rows, so following was turned off: {str(e)}")
+                new_rows = []
+            if new_rows:
+                distinct_cache.add_rows(new_rows)
+                fixture_combobox.config(values=distinct_cache.values(None, "Fixture No."))
+                selected_fixture = fixture_combobox.get()
+                if table_latest:
+                    # A latest-rows view is reloaded so it keeps exactly the newest rows
+                    if table_query is not None and any(table_query.matches(row) for row in new_rows):
+                        table_query = None
+                        filter_treeview()
+                    new_rows = []
+                appended = False
+                for row in new_rows:
+                    if table_query is None or not table_query.matches(row):
+                        continue
+                    if table_search and not inspection_store.text_matches(row, table_search):
+                        continue
+                    fixture_table.append(row)
+                    appended = True
+                    # A view of the whole table grows by itself; a filtered view gets the new row's id
+                    if shown_rows is fixture_table or getattr(shown_rows, "table", None) is not fixture_table:
+                        continue
+                    if selected_fixture and row[fixture_col] != selected_fixture:
+                        continue
+                    if all(row[col_index] in values for col_index, values in column_filter.items() if values):
+                        shown_rows.row_ids.append(len(fixture_table) - 1)
+                if appended and sort_state is not None:
+                    # New rows belong somewhere inside a sorted view, so re-walk the permutation
+                    filter_treeview()
+                else:
+                    tree_view.refresh()
+        root.after(FOLLOW_INTERVAL_MS, follow_tail)
 
     
     root = tk.Tk()
     root.title("View Accessories by Fixture")
-
-    # Load all data from the CSV file
-    header, data = load_all_data()
-
-    if not data:
+    column_filter = {}
+    fixture_table = InspectionTable()
+    table_query = None
+    table_search = ""
+    table_latest = None
+    sort_state = None
+    shown_rows = []
+
+    # Open the inspection store, importing new rows from the CSV file
+    header, store = load_all_data()
+
+    if store is None or not inspection_store.row_count(store):
         root.destroy()  # Exit the application if no data is loaded
     else:
         # Define column indices based on headers
@@ -694,14 +888,36 @@ def run_functionality_3():
         # Fixture Number selection combobox
         tk.Label(root, text="Select Fixture No.:").grid(row=0, column=0, padx=10, pady=10, sticky='e')
         
-        fixture_numbers = sorted(set(row[fixture_col] for row in data))
+        distinct_cache = DistinctValueCache(store)
+        fixture_numbers = distinct_cache.values(None, "Fixture No.")
         fixture_combobox = ttk.Combobox(root, values=fixture_numbers)
         fixture_combobox.grid(row=0, column=1, padx=10, pady=10, sticky='w')
         fixture_combobox.bind('<<ComboboxSelected>>', on_fixture_select)
         
         # Button to open the pivot chart window
-        pivot_chart_button = tk.Button(root, text="Open Pivot Chart Window", command=lambda:open_pivot_chart_window(data))
+        pivot_chart_button = tk.Button(root, text="Open Pivot Chart Window", command=open_pivot_chart_window)
         pivot_chart_button.grid(row=0, column=2, padx=20, pady=20)
+
+        # Buttons to move records between CSV files and the inspection store
+        import_button = tk.Button(root, text="Import CSV", command=import_data)
+        import_button.grid(row=0, column=3, padx=10, pady=20)
+        export_button = tk.Button(root, text="Export CSV", command=export_data)
+        export_button.grid(row=0, column=4, padx=10, pady=20)
+
+        # Follow mode picks up rows appended to the CSV files while the window is open
+        follow_var = BooleanVar(value=True)
+        follow_check = tk.Checkbutton(root, text="Follow new records", variable=follow_var)
+        follow_check.grid(row=0, column=5, padx=10, pady=20)
+        rescore_button = tk.Button(root, text="Re-score Status", command=rescore_history)
+        rescore_button.grid(row=0, column=6, padx=10, pady=20)
+        spc_button = tk.Button(root, text="SPC Charts", command=open_spc)
+        spc_button.grid(row=0, column=7, padx=10, pady=20)
+        stations_button = tk.Button(root, text="Load Stations", command=load_station_folder)
+        stations_button.grid(row=0, column=8, padx=10, pady=20)
+        hotspot_button = tk.Button(root, text="Plant Summary", command=open_hotspots)
+        hotspot_button.grid(row=0, column=9, padx=10, pady=20)
+        last_seen_id = inspection_store.last_row_id(store)
+        root.after(FOLLOW_INTERVAL_MS, follow_tail)
     
         # Create TreeView widget
         tree = ttk.Treeview(root, columns=header, show="headings")
@@ -718,6 +934,69 @@ def run_functionality_3():
         tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.grid(row=1, column=4, sticky='ns')
 
+        # Only the visible page of the result lives in the TreeView; the label shows where it is
+        row_count_label = tk.Label(root, text="No rows")
+        row_count_label.grid(row=3, column=0, columnspan=4, padx=10, sticky='w')
+        tree_view = VirtualTreeview(tree, scrollbar, row_count_label)
+
+        # Filters run on a background thread; the bar moves while one is in flight
+        busy_bar = ttk.Progressbar(root, mode="indeterminate", length=120)
+        busy_bar.grid(row=3, column=2, columnspan=2, padx=10, sticky='e')
+        busy_bar.grid_remove()
+        view_executor = ViewQueryExecutor()
+        view_executor.poll(root, show_busy)
+
+        def close_viewer():
+            """Stop the background query thread before closing the window."""
+            view_executor.close()
+            root.destroy()
+
+        root.protocol("WM_DELETE_WINDOW", close_viewer)
+
+        # Single-value filters for Machine No., Accessory No. and Date, filled from the distinct-value cache
+        filter_frame = tk.Frame(root)
+        filter_frame.grid(row=2, column=0, columnspan=4, padx=10, pady=10, sticky='w')
+        tk.Label(filter_frame, text="Machine No.:").grid(row=0, column=0, padx=5, sticky='e')
+        machine_combobox = ttk.Combobox(filter_frame, state="readonly")
+        machine_combobox.grid(row=0, column=1, padx=5)
+        machine_combobox.bind('<<ComboboxSelected>>', lambda e: on_filter_combobox_select(machine_col, machine_combobox))
+        tk.Label(filter_frame, text="Accessory No.:").grid(row=0, column=2, padx=5, sticky='e')
+        accessory_combobox = ttk.Combobox(filter_frame, state="readonly")
+        accessory_combobox.grid(row=0, column=3, padx=5)
+        accessory_combobox.bind('<<ComboboxSelected>>', lambda e: on_filter_combobox_select(accessory_col, accessory_combobox))
+        tk.Label(filter_frame, text="Date:").grid(row=0, column=4, padx=5, sticky='e')
+        date_combobox = ttk.Combobox(filter_frame, state="readonly")
+        date_combobox.grid(row=0, column=5, padx=5)
+        date_combobox.bind('<<ComboboxSelected>>', lambda e: on_filter_combobox_select(date_col, date_combobox))
+
+        # Date range and status are pushed down to the store when the fixture's rows are loaded
+        tk.Label(filter_frame, text="From Date (YYYY-MM-DD):").grid(row=1, column=0, padx=5, pady=5, sticky='e')
+        from_date_entry = tk.Entry(filter_frame)
+        from_date_entry.grid(row=1, column=1, padx=5, pady=5)
+        from_date_entry.bind('<Return>', lambda e: on_range_change())
+        tk.Label(filter_frame, text="To Date (YYYY-MM-DD):").grid(row=1, column=2, padx=5, pady=5, sticky='e')
+        to_date_entry = tk.Entry(filter_frame)
+        to_date_entry.grid(row=1, column=3, padx=5, pady=5)
+        to_date_entry.bind('<Return>', lambda e: on_range_change())
+        tk.Label(filter_frame, text="Status:").grid(row=1, column=4, padx=5, pady=5, sticky='e')
+        status_combobox = ttk.Combobox(filter_frame, values=["", "OK", "NG"], state="readonly")
+        status_combobox.grid(row=1, column=5, padx=5, pady=5)
+        status_combobox.bind('<<ComboboxSelected>>', lambda e: on_range_change())
+
+        # Newest rows first through the store's date indexes, without sorting
+        tk.Label(filter_frame, text="Latest rows:").grid(row=1, column=6, padx=5, pady=5, sticky='e')
+        latest_entry = tk.Entry(filter_frame, width=8)
+        latest_entry.grid(row=1, column=7, padx=5, pady=5)
+        latest_entry.bind('<Return>', lambda e: on_range_change())
+
+        # Substring search over Parameter, Observation and Remark, within the fixture when one is selected
+        tk.Label(filter_frame, text="Search text:").grid(row=2, column=0, padx=5, pady=5, sticky='e')
+        search_entry = tk.Entry(filter_frame)
+        search_entry.grid(row=2, column=1, columnspan=3, padx=5, pady=5, sticky='ew')
+        search_entry.bind('<Return>', lambda e: on_range_change())
+        tk.Button(filter_frame, text="Search", command=on_range_change).grid(row=2, column=4, padx=5, pady=5)
+        tk.Button(filter_frame, text="Clear", command=clear_search).grid(row=2, column=5, padx=5, pady=5, sticky='w')
+
         # Initially, the TreeView should be empty until a fixture is selected
         update_treeview([])
 
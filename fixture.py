@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 import os
-import csv
+import fixture_master
 
 def add_accessory_row():
     """Add a new row for accessory inputs."""
@@ -29,44 +29,26 @@ def add_accessory_row():
     # Move the "Add Accessory" button down
     add_button.grid(row=accessory_row_counter + 3, column=0, columnspan=4, pady=10, sticky='ew')
 
-def save_data_to_csv(accessory_data, filename="fixture_data.csv", update_existing=False):
+def save_data_to_csv(accessory_data, filename="fixture_data.csv"):
     """Save the accessory data to a CSV file with the specified format."""
     filepath = os.path.join(os.path.expanduser("~"), "Desktop", filename)
     
     try:
-        file_exists = os.path.isfile(filepath)
-        existing_data = []
-
-        if update_existing and file_exists:
-            # Read existing data
-            with open(filepath, mode='r') as file:
-                reader = csv.reader(file)
-                existing_data = list(reader)
-        
-        with open(filepath, mode='w', newline='') as file:
-            writer = csv.writer(file)
-
-            if not file_exists:
-                # Write CSV headers only if the file does not already exist
-                writer.writerow(["Fixture Number", "Fixture Name", "Accessory Name", "Accessory Number", 
-                                 "Parameter", "Specification", "Inspection Instrument"])
-
-            if update_existing:
-                # Preserve the existing data except the ones related to the currently edited fixture
-                for row in existing_data:
-                    if row and row[0] != accessory_data[0]['Fixture Number']:
-                        writer.writerow(row)
-
-            # Write fixture and accessory data
-            for accessory in accessory_data:
-                fixture_number = accessory.get('Fixture Number', fixture_entry.get())
-                fixture_name = accessory.get('Fixture Name', fixture_name_entry.get())
-                accessory_name = accessory.get('Name')
-                accessory_number = accessory.get('Number')
-                
-                for row in accessory['Details']:
-                    writer.writerow([fixture_number, fixture_name, accessory_name, accessory_number] + list(row[3:]))  # Adjust row order
-                    
+        # Group the rows by fixture so only the fixtures being saved are appended to the master log
+        rows_by_fixture = {}
+        for accessory in accessory_data:
+            fixture_number = accessory.get('Fixture Number', fixture_entry.get())
+            fixture_name = accessory.get('Fixture Name', fixture_name_entry.get())
+            accessory_name = accessory.get('Name')
+            accessory_number = accessory.get('Number')
+            fixture_rows = rows_by_fixture.setdefault(fixture_number, [])
+
+            for row in accessory['Details']:
+                fixture_rows.append([fixture_number, fixture_name, accessory_name, accessory_number] + list(row[3:]))  # Adjust row order
+
+        # Other fixtures are never rewritten; the log is compacted atomically once it grows
+        fixture_master.save_fixtures(rows_by_fixture, filepath)
+
         messagebox.showinfo("Save Data", f"Data saved to {filepath}")
     
     except PermissionError:
@@ -141,31 +123,28 @@ def load_data_from_csv(filename="fixture_data.csv"):
         return
 
     try:
-        with open(filepath, mode='r') as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip the header
-
-            for row in reader:
-                fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row
-                
-                # Check if accessory already exists in accessory_data
-                accessory = next((a for a in accessory_data if a['Number'] == acc_num), None)
-                if not accessory:
-                    accessory = {
-                        'Fixture Number': fixture_number,
-                        'Fixture Name': fixture_name,
-                        'Number': acc_num,
-                        'Name': acc_name,
-                        'Details': []
-                    }
-                    accessory_data.append(accessory)
-
-                accessory['Details'].append((1, acc_num, acc_name, parameter, specification, inspection_instrument))
-
-            fixture_entry.delete(0, tk.END)
-            fixture_entry.insert(0, fixture_number)
-            fixture_name_entry.delete(0, tk.END)
-            fixture_name_entry.insert(0, fixture_name)
+        # Snapshot rows with the latest logged version of each fixture applied
+        for row in fixture_master.load_rows(filepath):
+            fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row
+            
+            # Check if accessory already exists in accessory_data
+            accessory = next((a for a in accessory_data if a['Number'] == acc_num), None)
+            if not accessory:
+                accessory = {
+                    'Fixture Number': fixture_number,
+                    'Fixture Name': fixture_name,
+                    'Number': acc_num,
+                    'Name': acc_name,
+                    'Details': []
+                }
+                accessory_data.append(accessory)
+
+            accessory['Details'].append((1, acc_num, acc_name, parameter, specification, inspection_instrument))
+
+        fixture_entry.delete(0, tk.END)
+        fixture_entry.insert(0, fixture_number)
+        fixture_name_entry.delete(0, tk.END)
+        fixture_name_entry.insert(0, fixture_name)
 
         open_accessory_details_window()
     
@@ -231,7 +210,7 @@ def open_accessory_details_window():
     # Add a button to submit all details
     def final_submit():
         save_accessory_details()
-        save_data_to_csv(accessory_data, update_existing=True)
+        save_data_to_csv(accessory_data)
         details_window.destroy()
 
     submit_button = tk.Button(details_window, text="Final Submit", command=final_submit)
@@ -0,0 +1,258 @@
+import csv
+import hashlib
+import io
+import locale
+import os
+import pickle
+
+# fixture_data.csv is a compacted snapshot; saves append one block per fixture to fixture_data.csv.log
+# and the latest block for a fixture replaces its rows in the snapshot until the log is compacted.
+FIXTURE_HEADER = ["Fixture Number", "Fixture Name", "Accessory Name", "Accessory Number",
+                  "Parameter", "Specification", "Inspection Instrument"]
+MASTER_PATH = os.path.join(os.path.expanduser("~"), "Desktop", "fixture_data.csv")
+# Each block is "#block,<fixture>,<rows>", the rows, then "#end,<fixture>,<rows>,<checksum of the row bytes>"
+BLOCK_MARKER = "#block"
+END_MARKER = "#end"
+# Blocks written before end markers existed
+LEGACY_BLOCK_MARKER = "#fixture"
+# The log is written in binary to know block offsets, in the encoding text-mode CSV files use
+LOG_ENCODING = locale.getpreferredencoding(False)
+COMPACT_MIN_LOG_SIZE = 1 << 20
+CACHE_VERSION = 1
+
+
+def log_path(filepath):
+    """Return the path of the append-only log next to a fixture master snapshot."""
+    return filepath + ".log"
+
+
+def _fsync_directory(directory):
+    """Flush a directory entry so a rename survives a crash (no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _log_records(file):
+    """Yield (row, raw_bytes, end_offset) for every complete CSV record of a log opened in binary mode.
+
+    A record ends at a newline outside quotes; a last record cut off before its newline is not yielded.
+    """
+    pending, offset = b"", 0
+    for line in file:
+        offset += len(line)
+        pending += line
+        # csv.writer doubles quotes inside fields, so an odd count means a quoted newline continues the record
+        if not pending.endswith(b"\n") or pending.count(b'"') % 2:
+            continue
+        yield next(csv.reader(io.StringIO(pending.decode(LOG_ENCODING, errors='replace'), newline='')), []), pending, offset
+        pending = b""
+
+
+def _rows_valid(fixture_number, rows):
+    """Return True when every row of a block belongs to its fixture and has the master's columns."""
+    return all(len(row) == len(FIXTURE_HEADER) and row[0] == fixture_number for row in rows)
+
+
+def _checksum(data):
+    """Return the checksum written after a block's rows."""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _scan_log(filepath):
+    """Return ([(fixture_number, rows)], end_offset) for the intact blocks of the log.
+
+    A block is intact when its end marker repeats the fixture number and row count and its
+    checksum matches the row bytes, and every row is a full row of that fixture. end_offset
+    is where the last intact block ends; anything after it is left over from a torn append.
+    Blocks written before end markers existed are accepted when their rows are valid.
+    """
+    path = log_path(filepath)
+    blocks, good_end = [], 0
+    if not os.path.exists(path):
+        return blocks, good_end
+    with open(path, mode='rb') as file:
+        # [fixture_number, expected rows, rows, row bytes, has an end marker]
+        current = None
+        for row, raw, end_offset in _log_records(file):
+            starts = len(row) >= 3 and row[0] in (BLOCK_MARKER, LEGACY_BLOCK_MARKER) and row[2].isdigit()
+            if current is not None and not current[4] and (starts or row[:1] == [END_MARKER]):
+                current = None
+            if row[:1] == [END_MARKER]:
+                if (current is not None and row[1:] == [current[0], str(current[1]), _checksum(current[3])]
+                        and len(current[2]) == current[1] and _rows_valid(current[0], current[2])):
+                    blocks.append((current[0], current[2]))
+                    good_end = end_offset
+                current = None
+            elif starts:
+                current = [row[1], int(row[2]), [], b"", row[0] == BLOCK_MARKER]
+            elif current is not None:
+                current[2].append(row)
+                current[3] += raw
+            if current is not None and not current[4] and len(current[2]) == current[1]:
+                if _rows_valid(current[0], current[2]):
+                    blocks.append((current[0], current[2]))
+                    good_end = end_offset
+                current = None
+    return blocks, good_end
+
+
+def load_fixtures(filepath=MASTER_PATH):
+    """Return the current rows of the fixture master grouped by fixture number."""
+    rows_by_fixture = {}
+    if os.path.exists(filepath):
+        with open(filepath, mode='r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row in reader:
+                if row:
+                    rows_by_fixture.setdefault(row[0], []).append(row)
+    for fixture_number, rows in _scan_log(filepath)[0]:
+        if rows:
+            rows_by_fixture[fixture_number] = rows
+        else:
+            rows_by_fixture.pop(fixture_number, None)
+    return rows_by_fixture
+
+
+def load_rows(filepath=MASTER_PATH):
+    """Yield every current row of the fixture master in snapshot order."""
+    for rows in load_fixtures(filepath).values():
+        yield from rows
+
+
+def _encode_rows(rows):
+    """Return rows as CSV bytes in the log's encoding."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode(LOG_ENCODING)
+
+
+def save_fixtures(rows_by_fixture, filepath=MASTER_PATH):
+    """Add or replace the rows of the given fixtures without rewriting the other fixtures."""
+    if not os.path.exists(filepath):
+        compact(filepath, extra=rows_by_fixture)
+        return
+    data = b""
+    for fixture_number, rows in rows_by_fixture.items():
+        fixture_number = str(fixture_number)
+        width = len(FIXTURE_HEADER)
+        rows = [[str(value) for value in row[:width]] + [''] * (width - len(row)) for row in rows]
+        row_data = _encode_rows(rows)
+        data += _encode_rows([[BLOCK_MARKER, fixture_number, len(rows)]]) + row_data
+        data += _encode_rows([[END_MARKER, fixture_number, len(rows), _checksum(row_data)]])
+    # A torn append from an earlier crash is cut off first, so the new block never joins its partial row
+    good_end = _scan_log(filepath)[1]
+    # One write and fsync per save so a block is either fully on disk or detected as torn
+    with open(log_path(filepath), mode='ab') as file:
+        if file.tell() > good_end:
+            file.truncate(good_end)
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    log_size = os.path.getsize(log_path(filepath))
+    if log_size > max(COMPACT_MIN_LOG_SIZE, os.path.getsize(filepath)):
+        compact(filepath)
+
+
+def compact(filepath=MASTER_PATH, extra=None):
+    """Atomically rewrite the snapshot with the log applied and clear the log."""
+    rows_by_fixture = load_fixtures(filepath)
+    rows_by_fixture.update(extra or {})
+    temp_path = filepath + ".tmp"
+    with open(temp_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIXTURE_HEADER)
+        for rows in rows_by_fixture.values():
+            writer.writerows(rows)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, filepath)
+    _fsync_directory(os.path.dirname(os.path.abspath(filepath)))
+    # Replaying a leftover log after a crash here is harmless because blocks replace whole fixtures
+    if os.path.exists(log_path(filepath)):
+        os.remove(log_path(filepath))
+
+
+def cache_path(filepath):
+    """Return the path of the compiled accessory-map cache next to a fixture master snapshot."""
+    return filepath + ".cache"
+
+
+def _source_stats(filepath):
+    """Return (path, size, mtime) for the snapshot and its log, the cheap part of the cache key."""
+    stats = []
+    for path in (filepath, log_path(filepath)):
+        try:
+            info = os.stat(path)
+            stats.append((path, info.st_size, info.st_mtime_ns))
+        except OSError:
+            stats.append((path, None, None))
+    return stats
+
+
+def _source_hash(filepath):
+    """Return a content hash over the snapshot and its log."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (filepath, log_path(filepath)):
+        digest.update(path.encode('utf-8') + b'\0')
+        if os.path.exists(path):
+            with open(path, mode='rb') as file:
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def build_accessory_map(filepath=MASTER_PATH):
+    """Group the accessory rows of the fixture master by fixture number."""
+    fixture_accessory_map = {}
+    for row in load_rows(filepath):
+        fixture_number, fixture_name, acc_name, acc_num, parameter, specification, inspection_instrument = row[:7]
+        if fixture_number not in fixture_accessory_map:
+            fixture_accessory_map[fixture_number] = []
+        fixture_accessory_map[fixture_number].append({
+            "Accessory Number": acc_num,
+            "Accessory Name": acc_name,
+            "Parameter": parameter,
+            "Specification": specification,
+            "Inspection Instrument": inspection_instrument
+        })
+    return fixture_accessory_map
+
+
+def load_accessory_map(filepath=MASTER_PATH):
+    """Return the accessory map from the compiled cache, rebuilding it only when the master changed."""
+    stats = _source_stats(filepath)
+    cached = None
+    try:
+        with open(cache_path(filepath), mode='rb') as file:
+            cached = pickle.load(file)
+        if cached.get("version") != CACHE_VERSION:
+            cached = None
+    except Exception:
+        cached = None
+    if cached is not None and cached["stats"] == stats:
+        return cached["map"]
+    content_hash = _source_hash(filepath)
+    if cached is not None and cached["hash"] == content_hash:
+        # Touched but unchanged (e.g. copied back from a backup), so only the stats are refreshed
+        fixture_accessory_map = cached["map"]
+    else:
+        fixture_accessory_map = build_accessory_map(filepath)
+    temp_path = cache_path(filepath) + ".tmp"
+    try:
+        with open(temp_path, mode='wb') as file:
+            pickle.dump({"version": CACHE_VERSION, "stats": stats, "hash": content_hash, "map": fixture_accessory_map},
+                        file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path(filepath))
+    except OSError:
+        pass
+    return fixture_accessory_map
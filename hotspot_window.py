@@ -0,0 +1,77 @@
+import tkinter as tk
+from datetime import date
+from tkinter import ttk
+
+import inspection_store
+
+ALL_TIME = "All time"
+HOTSPOT_ROWS = 20
+HOTSPOT_COLUMNS = ["Value", "NG Count", "Overcount"]
+
+
+def _month_label(month):
+    """Show a partition key such as 2024_05 as 2024-05."""
+    return "Undated" if month == inspection_store.UNDATED else month.replace("_", "-")
+
+
+def open_hotspot_window(root, store):
+    """Open approximate distinct counts per month and the NG hotspots by fixture, accessory and machine.
+
+    Both come from fixed-size sketches the store keeps up to date on every insert, so the
+    window opens instantly and its memory does not grow with the inspection history.
+    """
+    window = tk.Toplevel(root)
+    window.title("Plant Summary")
+
+    months = {}
+    tk.Label(window, text="Month:").grid(row=0, column=0, padx=10, pady=10, sticky='e')
+    month_combobox = ttk.Combobox(window, state="readonly")
+    month_combobox.grid(row=0, column=1, padx=10, pady=10, sticky='w')
+
+    distinct_labels = {}
+    distinct_frame = tk.Frame(window)
+    distinct_frame.grid(row=1, column=0, columnspan=len(inspection_store.SKETCH_COLUMNS), padx=10, sticky='w')
+    for col_index, column_name in enumerate(inspection_store.SKETCH_COLUMNS):
+        distinct_labels[column_name] = tk.Label(distinct_frame, text="")
+        distinct_labels[column_name].grid(row=0, column=col_index, padx=10, pady=5, sticky='w')
+
+    trees = {}
+    for col_index, column_name in enumerate(inspection_store.SKETCH_COLUMNS):
+        tk.Label(window, text=f"Top {HOTSPOT_ROWS} {column_name} by NG (all time)").grid(
+            row=2, column=col_index, padx=10, pady=(10, 0), sticky='w')
+        tree = ttk.Treeview(window, columns=HOTSPOT_COLUMNS, show="headings", height=HOTSPOT_ROWS)
+        for col in HOTSPOT_COLUMNS:
+            tree.heading(col, text=col)
+            tree.column(col, width=90, anchor='center')
+        tree.grid(row=3, column=col_index, padx=10, pady=10, sticky='nsew')
+        trees[column_name] = tree
+        window.columnconfigure(col_index, weight=1)
+    window.rowconfigure(3, weight=1)
+
+    def show_distinct(event=None):
+        """Show the estimated distinct counts for the chosen month."""
+        selected = months.get(month_combobox.get())
+        for column_name, label in distinct_labels.items():
+            estimate = inspection_store.distinct_estimate(store, column_name, selected and [selected])
+            label.config(text=f"Distinct {column_name}: ~{estimate}")
+
+    def load_summary():
+        """Refill the month list, the distinct counts and the hotspot tables from the sketches."""
+        months.clear()
+        months[ALL_TIME] = None
+        for month in reversed(inspection_store.sketch_months(store)):
+            months[_month_label(month)] = month
+        month_combobox.config(values=list(months))
+        current = _month_label(date.today().strftime("%Y_%m"))
+        if month_combobox.get() not in months:
+            month_combobox.set(current if current in months else ALL_TIME)
+        show_distinct()
+        for column_name, tree in trees.items():
+            tree.delete(*tree.get_children())
+            for value, count, error in inspection_store.ng_hotspots(store, column_name, HOTSPOT_ROWS):
+                tree.insert("", tk.END, values=(value, count, f"≤{error}" if error else ""))
+
+    month_combobox.bind('<<ComboboxSelected>>', show_distinct)
+    tk.Button(window, text="Refresh", command=load_summary).grid(row=4, column=0, pady=10)
+    load_summary()
+    return window
@@ -0,0 +1,206 @@
+from datetime import date
+
+from inspection_store import COLUMN_FOR_HEADER, STORE_HEADER, UNDATED, partition_key
+
+OPERATORS = ("=", "in", "between", ">=", "<=")
+
+
+class Predicate:
+    """One condition on a column: equality, membership, an inclusive range or a single bound.
+
+    Values are compared as strings, which orders ISO dates (YYYY-MM-DD) correctly.
+    """
+
+    def __init__(self, column, op, value):
+        if column not in COLUMN_FOR_HEADER:
+            raise ValueError(f"Unknown column: {column}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator: {op}")
+        self.column = column
+        self.col_index = STORE_HEADER.index(column)
+        self.op = op
+        self.value = tuple(sorted(set(value))) if op == "in" else tuple(value) if op == "between" else value
+
+    def sql(self):
+        """Return the SQL clause and its parameters."""
+        column = COLUMN_FOR_HEADER[self.column]
+        if self.op == "in":
+            if not self.value:
+                return "0", []
+            return f"{column} IN ({', '.join('?' for _ in self.value)})", list(self.value)
+        if self.op == "between":
+            return f"{column} BETWEEN ? AND ?", list(self.value)
+        return f"{column} {self.op} ?", [self.value]
+
+    def test(self, value):
+        """Evaluate the predicate on one cell."""
+        if self.op == "=":
+            return value == self.value
+        if self.op == "in":
+            return value in self.value
+        if self.op == "between":
+            return self.value[0] <= value <= self.value[1]
+        if self.op == ">=":
+            return value >= self.value
+        return value <= self.value
+
+    def mask(self, series):
+        """Evaluate the predicate on a pandas Series of strings, parsed dates or categoricals."""
+        value = self.value
+        if series.dtype.kind == "M":
+            # Parsed dates are compared against the ISO strings converted to datetime64
+            convert = series.dtype.type
+            value = tuple(convert(item) for item in value) if isinstance(value, tuple) else convert(value)
+        elif self.op not in ("=", "in") and str(series.dtype) == "category":
+            # Unordered categoricals only support equality, so ranges compare the text
+            series = series.astype(str)
+        if self.op == "=":
+            return series == value
+        if self.op == "in":
+            return series.isin(value)
+        if self.op == "between":
+            return (series >= value[0]) & (series <= value[1])
+        if self.op == ">=":
+            return series >= value
+        return series <= value
+
+    def key(self):
+        return (self.column, self.op, self.value)
+
+
+def equals(column, value):
+    """Rows whose column equals a value."""
+    return Predicate(column, "=", value)
+
+
+def one_of(column, values):
+    """Rows whose column is one of the values (none when the values are empty)."""
+    return Predicate(column, "in", values)
+
+
+def between(column, low, high):
+    """Rows whose column lies in an inclusive range."""
+    return Predicate(column, "between", (low, high))
+
+
+def at_least(column, low):
+    """Rows whose column is at or above a bound."""
+    return Predicate(column, ">=", low)
+
+
+def at_most(column, high):
+    """Rows whose column is at or below a bound."""
+    return Predicate(column, "<=", high)
+
+
+def status_is(status):
+    """Rows with the given Status (OK or NG)."""
+    return equals("Status", status)
+
+
+def date_range(first=None, last=None):
+    """Return the predicates for an inclusive YYYY-MM-DD date range; either end may be empty.
+
+    Raises ValueError when a given end is not an ISO date.
+    """
+    for value in (first, last):
+        if value:
+            date.fromisoformat(value)
+    if first and last:
+        return [between("Date", first, last)]
+    if first:
+        return [at_least("Date", first)]
+    if last:
+        return [at_most("Date", last)]
+    return []
+
+
+class Query:
+    """A conjunction of predicates that can run in SQLite, on pandas frames or on single rows."""
+
+    def __init__(self, *predicates):
+        self.predicates = [predicate for predicate in predicates if predicate is not None]
+
+    def where(self, *predicates):
+        """Return a new query with more predicates added."""
+        return Query(*self.predicates, *predicates)
+
+    def key(self):
+        """Return a hashable description, e.g. to tell whether a cached result still applies."""
+        return tuple(sorted(predicate.key() for predicate in self.predicates))
+
+    def columns(self):
+        """Return the columns the predicates read."""
+        return [predicate.column for predicate in self.predicates]
+
+    def sql(self):
+        """Return the WHERE clause (with a leading space, or empty) and its parameters."""
+        clauses, params = [], []
+        for predicate in self.predicates:
+            clause, clause_params = predicate.sql()
+            clauses.append(clause)
+            params.extend(clause_params)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def matches(self, row):
+        """Evaluate the query on one stored row (STORE_HEADER order)."""
+        return all(predicate.test(row[predicate.col_index]) for predicate in self.predicates)
+
+    def mask(self, frame):
+        """Return a boolean mask of the frame rows that match (the frame needs the queried columns)."""
+        result = None
+        for predicate in self.predicates:
+            series = frame[predicate.column]
+            if series.dtype.kind != "M" and str(series.dtype) != "category":
+                series = series.astype(str)
+            column_mask = predicate.mask(series)
+            result = column_mask if result is None else result & column_mask
+        return result
+
+    def date_bounds(self):
+        """Return the (first, last) dates the query can match, None meaning unbounded."""
+        first = last = None
+        for predicate in self.predicates:
+            if predicate.column != "Date":
+                continue
+            if predicate.op == "=":
+                low = high = predicate.value
+            elif predicate.op == "in":
+                if not predicate.value:
+                    continue
+                low, high = predicate.value[0], predicate.value[-1]
+            elif predicate.op == "between":
+                low, high = predicate.value
+            elif predicate.op == ">=":
+                low, high = predicate.value, None
+            else:
+                low, high = None, predicate.value
+            if low is not None and (first is None or low > first):
+                first = low
+            if high is not None and (last is None or high < last):
+                last = high
+        return first, last
+
+    def partition_filter(self):
+        """Return a test on monthly partition keys that skips months the query cannot match, or None."""
+        date_predicates = [predicate for predicate in self.predicates if predicate.column == "Date"]
+        if not date_predicates:
+            return None
+        first, last = self.date_bounds()
+        allowed = None
+        for predicate in date_predicates:
+            if predicate.op in ("=", "in"):
+                values = [predicate.value] if predicate.op == "=" else predicate.value
+                keys = {partition_key(value) for value in values}
+                allowed = keys if allowed is None else allowed & keys
+        first_key = partition_key(first) if first else None
+        last_key = partition_key(last) if last else None
+
+        def keep(key):
+            if allowed is not None:
+                return key in allowed
+            if key == UNDATED:
+                # Date ranges are over ISO dates, so rows stored without one are left out
+                return first_key == UNDATED or last_key == UNDATED
+            return (first_key is None or key >= first_key) and (last_key is None or key <= last_key)
+        return keep
@@ -0,0 +1,748 @@
+import csv
+import heapq
+import math
+import os
+import pathlib
+import sqlite3
+from collections import Counter
+
+from csv_index import MappedCSV
+from sketches import HyperLogLog, SpaceSaving
+
+# Column layout of All_Accessories_Data.csv and the matching SQLite columns
+HEADER = ["Date", "Machine No.", "Operation", "Fixture No.", "Accessory No.", "Accessory Name",
+          "Parameter", "Specification", "Inspection Instrument", "Observation", "Remark", "Status"]
+COLUMNS = ["date", "machine_no", "operation", "fixture_no", "accessory_no", "accessory_name",
+           "parameter", "specification", "inspection_instrument", "observation", "remark", "status"]
+# Stored rows also record the station file they were read from
+SOURCE_COLUMN = "Source"
+STORE_HEADER = HEADER + [SOURCE_COLUMN]
+STORE_COLUMNS = COLUMNS + ["source"]
+COLUMN_FOR_HEADER = dict(zip(STORE_HEADER, STORE_COLUMNS))
+
+STORE_PATH = os.path.join(os.path.expanduser("~"), "Desktop", "All_Accessories_Data.db")
+CHUNK_ROWS = 10000
+UNDATED = "undated"
+# Columns whose per-fixture value counts are kept up to date on every insert
+COUNTED_COLUMNS = ["Fixture No.", "Machine No.", "Accessory No.", "Date"]
+# Dimensions of the rollup cube, which holds the inspection count of every combination
+CUBE_COLUMNS = ["Date", "Machine No.", "Fixture No.", "Accessory No.", "Operation", "Status"]
+# Free-text columns covered by the trigram full-text index
+TEXT_COLUMNS = ["Parameter", "Observation", "Remark"]
+GRAM_SIZE = 3
+# Observations kept per (fixture, accessory, parameter) for control charts
+SPC_RECENT_POINTS = 100
+SPC_KEY = ["Fixture No.", "Accessory No.", "Parameter"]
+# Columns with a distinct-count sketch per month and a top-k summary of their NG counts
+SKETCH_COLUMNS = ["Fixture No.", "Accessory No.", "Machine No."]
+
+
+def open_store(filepath=STORE_PATH):
+    """Open (and create if needed) the SQLite inspection store."""
+    conn = sqlite3.connect(filepath)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Inspections live in one table per month; the catalog lists them and ids are global across months
+    conn.execute("CREATE TABLE IF NOT EXISTS partitions (key TEXT PRIMARY KEY, name TEXT NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('last_id', 0)")
+    # Byte offset up to which each CSV file has been imported, so re-imports only read the new tail
+    conn.execute("CREATE TABLE IF NOT EXISTS csv_sources (path TEXT PRIMARY KEY, offset INTEGER NOT NULL)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS value_counts (fixture_no TEXT NOT NULL, column_name TEXT NOT NULL, "
+        "value TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (fixture_no, column_name, value))"
+    )
+    # Trigram full-text index of the text columns, keyed by row id; contentless, since rows are read from
+    # their partitions, and without positions, since hits are checked against the row text anyway
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS text_index USING fts5({', '.join(_text_columns())}, "
+            "tokenize='trigram', content='', detail='none')"
+        )
+    except sqlite3.OperationalError:
+        # SQLite before 3.34 has no trigram tokenizer; searches then check every queried row
+        pass
+    cube_columns = [COLUMN_FOR_HEADER[column_name] for column_name in CUBE_COLUMNS]
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS rollup ({', '.join(f'{col} TEXT NOT NULL' for col in cube_columns)}, "
+        f"count INTEGER NOT NULL, PRIMARY KEY ({', '.join(cube_columns)}))"
+    )
+    # Running SPC statistics (Welford mean and M2, moving ranges) and the latest points per parameter
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS spc_stats (fixture_no TEXT NOT NULL, accessory_no TEXT NOT NULL, "
+        "parameter TEXT NOT NULL, specification TEXT NOT NULL, n INTEGER NOT NULL, mean REAL NOT NULL, "
+        "m2 REAL NOT NULL, last_value REAL, mr_sum REAL NOT NULL, mr_count INTEGER NOT NULL, "
+        "PRIMARY KEY (fixture_no, accessory_no, parameter))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS spc_points (fixture_no TEXT NOT NULL, accessory_no TEXT NOT NULL, "
+        "parameter TEXT NOT NULL, row_id INTEGER NOT NULL, date TEXT NOT NULL, value REAL NOT NULL, "
+        "PRIMARY KEY (fixture_no, accessory_no, parameter, row_id)) WITHOUT ROWID"
+    )
+    # Fixed-size summaries: HyperLogLog registers per column and month, Space-Saving counters of NG rows
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS distinct_sketches (column_name TEXT NOT NULL, month TEXT NOT NULL, "
+        "registers BLOB NOT NULL, PRIMARY KEY (column_name, month))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS ng_topk (column_name TEXT NOT NULL, item TEXT NOT NULL, count INTEGER NOT NULL, "
+        "error INTEGER NOT NULL, PRIMARY KEY (column_name, item))"
+    )
+    conn.commit()
+    _migrate_single_table(conn)
+    if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'source_column'").fetchone():
+        _add_source_column(conn)
+    if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'value_counts_built'").fetchone():
+        _rebuild_value_counts(conn)
+    if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'fts_index_built'").fetchone():
+        _rebuild_text_index(conn)
+    if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'rollup_built'").fetchone():
+        _rebuild_rollup(conn)
+    if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'spc_built'").fetchone():
+        _rebuild_spc(conn)
+    if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'sketches_built'").fetchone():
+        _rebuild_sketches(conn)
+    return conn
+
+
+def open_store_readonly(filepath=STORE_PATH):
+    """Open an existing store for reading only, e.g. from worker processes that must not contend for writes."""
+    return sqlite3.connect(pathlib.Path(os.path.abspath(filepath)).as_uri() + "?mode=ro", uri=True)
+
+
+def partition_key(value):
+    """Return the YYYY_MM partition for a date string, or UNDATED when it is not an ISO date."""
+    value = str(value)
+    if len(value) >= 7 and value[:4].isdigit() and value[4] == '-' and value[5:7].isdigit():
+        return f"{value[:4]}_{value[5:7]}"
+    return UNDATED
+
+
+def _create_partition(conn, key):
+    """Create the table and indexes for one month and register it in the catalog."""
+    name = f"inspections_{key}"
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, "
+        + ", ".join(f"{col} TEXT NOT NULL DEFAULT ''" for col in STORE_COLUMNS) + ")"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{key}_fixture_date ON {name} (fixture_no, date)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{key}_machine ON {name} (machine_no)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{key}_accessory ON {name} (accessory_no)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{key}_date ON {name} (date)")
+    conn.execute("INSERT OR IGNORE INTO partitions (key, name) VALUES (?, ?)", (key, name))
+    return name
+
+
+def partitions(conn, keys=None):
+    """Return the partition table names, limited to the given month keys (a collection or a test) when provided."""
+    found = conn.execute("SELECT key, name FROM partitions ORDER BY key").fetchall()
+    if callable(keys):
+        return [name for key, name in found if keys(key)]
+    return [name for key, name in found if keys is None or key in keys]
+
+
+def _migrate_single_table(conn):
+    """Move rows from the original unpartitioned table into monthly partitions."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inspections'").fetchone():
+        return
+    found = conn.execute(f"SELECT id, {', '.join(COLUMNS)} FROM inspections ORDER BY id").fetchall()
+    _insert(conn, [row[1:] for row in found], ids=[row[0] for row in found])
+    conn.execute("DROP TABLE inspections")
+    conn.commit()
+
+
+def _add_source_column(conn):
+    """Add the Source column to partitions created before it; their rows keep an empty source."""
+    for name in partitions(conn):
+        found = [info[1] for info in conn.execute(f"PRAGMA table_info({name})")]
+        if "source" not in found:
+            conn.execute(f"ALTER TABLE {name} ADD COLUMN source TEXT NOT NULL DEFAULT ''")
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('source_column', 1)")
+    conn.commit()
+
+
+def _rebuild_value_counts(conn):
+    """Recount the tracked columns of every partition (for stores created before value_counts)."""
+    conn.execute("DELETE FROM value_counts")
+    for name in partitions(conn):
+        for column_name in COUNTED_COLUMNS:
+            column = COLUMN_FOR_HEADER[column_name]
+            conn.execute(
+                f"INSERT INTO value_counts (fixture_no, column_name, value, count) "
+                f"SELECT fixture_no, ?, {column}, COUNT(*) FROM {name} WHERE 1 GROUP BY fixture_no, {column} "
+                "ON CONFLICT (fixture_no, column_name, value) DO UPDATE SET count = count + excluded.count",
+                (column_name,)
+            )
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('value_counts_built', 1)")
+    conn.commit()
+
+
+def _count_values(conn, rows):
+    """Add the tracked column values of new rows to value_counts."""
+    fixture_index = HEADER.index("Fixture No.")
+    counted = [(column_name, HEADER.index(column_name)) for column_name in COUNTED_COLUMNS]
+    counts = Counter()
+    for row in rows:
+        for column_name, col_index in counted:
+            counts[(row[fixture_index], column_name, row[col_index])] += 1
+    conn.executemany(
+        "INSERT INTO value_counts (fixture_no, column_name, value, count) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (fixture_no, column_name, value) DO UPDATE SET count = count + excluded.count",
+        [key + (count,) for key, count in counts.items()]
+    )
+
+
+def _rebuild_rollup(conn):
+    """Recount the rollup cube from every partition (for stores created before the cube)."""
+    cube_columns = ", ".join(COLUMN_FOR_HEADER[column_name] for column_name in CUBE_COLUMNS)
+    conn.execute("DELETE FROM rollup")
+    for name in partitions(conn):
+        conn.execute(
+            f"INSERT INTO rollup ({cube_columns}, count) SELECT {cube_columns}, COUNT(*) FROM {name} WHERE 1 "
+            f"GROUP BY {cube_columns} ON CONFLICT ({cube_columns}) DO UPDATE SET count = count + excluded.count"
+        )
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('rollup_built', 1)")
+    conn.commit()
+
+
+def _count_rollup(conn, rows, sign=1):
+    """Add new rows to the rollup cube (or take them out with sign=-1)."""
+    cube_indexes = [HEADER.index(column_name) for column_name in CUBE_COLUMNS]
+    counts = Counter()
+    for row in rows:
+        counts[tuple(row[col_index] for col_index in cube_indexes)] += sign
+    cube_columns = ", ".join(COLUMN_FOR_HEADER[column_name] for column_name in CUBE_COLUMNS)
+    conn.executemany(
+        f"INSERT INTO rollup ({cube_columns}, count) VALUES ({', '.join('?' for _ in range(len(CUBE_COLUMNS) + 1))}) "
+        f"ON CONFLICT ({cube_columns}) DO UPDATE SET count = count + excluded.count",
+        [key + (count,) for key, count in counts.items()]
+    )
+
+
+def _observation_value(value):
+    """Return an observation as a finite float, or None when it is not a number."""
+    try:
+        number = float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _update_spc(conn, ids, rows):
+    """Fold new numeric observations into the running SPC statistics of their parameters."""
+    key_indexes = [HEADER.index(column_name) for column_name in SPC_KEY]
+    observation_index = HEADER.index("Observation")
+    specification_index = HEADER.index("Specification")
+    date_index = HEADER.index("Date")
+    by_key = {}
+    for row_id, row in zip(ids, rows):
+        value = _observation_value(row[observation_index])
+        if value is not None:
+            key = tuple(row[col_index] for col_index in key_indexes)
+            by_key.setdefault(key, []).append((row_id, value, row[specification_index], row[date_index]))
+    for key, points in by_key.items():
+        points.sort()
+        found = conn.execute(
+            "SELECT n, mean, m2, last_value, mr_sum, mr_count FROM spc_stats "
+            "WHERE fixture_no = ? AND accessory_no = ? AND parameter = ?", key
+        ).fetchone()
+        n, mean, m2, last_value, mr_sum, mr_count = found or (0, 0.0, 0.0, None, 0.0, 0)
+        for _, value, _, _ in points:
+            # Welford's update keeps the mean and sum of squared deviations exact without the history
+            n += 1
+            delta = value - mean
+            mean += delta / n
+            m2 += delta * (value - mean)
+            if last_value is not None:
+                mr_sum += abs(value - last_value)
+                mr_count += 1
+            last_value = value
+        conn.execute(
+            "INSERT OR REPLACE INTO spc_stats (fixture_no, accessory_no, parameter, specification, n, mean, m2, "
+            "last_value, mr_sum, mr_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            key + (points[-1][2], n, mean, m2, last_value, mr_sum, mr_count)
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO spc_points (fixture_no, accessory_no, parameter, row_id, date, value) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [key + (row_id, date, value) for row_id, value, _, date in points[-SPC_RECENT_POINTS:]]
+        )
+        conn.execute(
+            "DELETE FROM spc_points WHERE fixture_no = ? AND accessory_no = ? AND parameter = ? AND row_id NOT IN "
+            "(SELECT row_id FROM spc_points WHERE fixture_no = ? AND accessory_no = ? AND parameter = ? "
+            "ORDER BY row_id DESC LIMIT ?)",
+            key + key + (SPC_RECENT_POINTS,)
+        )
+
+
+def _rebuild_spc(conn):
+    """Compute the SPC statistics from every stored row in id order (for stores created before them)."""
+    conn.execute("DELETE FROM spc_stats")
+    conn.execute("DELETE FROM spc_points")
+    batch = []
+    for row in _select(conn):
+        batch.append(row)
+        if len(batch) >= CHUNK_ROWS:
+            _update_spc(conn, [found[0] for found in batch], [found[1:] for found in batch])
+            batch = []
+    _update_spc(conn, [found[0] for found in batch], [found[1:] for found in batch])
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('spc_built', 1)")
+    conn.commit()
+
+
+def _add_distinct(conn, column_name, by_month):
+    """Add {month: set of values} to a column's distinct-count sketches."""
+    for month, values in by_month.items():
+        found = conn.execute(
+            "SELECT registers FROM distinct_sketches WHERE column_name = ? AND month = ?", (column_name, month)
+        ).fetchone()
+        sketch = HyperLogLog(found[0] if found else None)
+        sketch.update(values)
+        conn.execute(
+            "INSERT OR REPLACE INTO distinct_sketches (column_name, month, registers) VALUES (?, ?, ?)",
+            (column_name, month, sketch.to_bytes())
+        )
+
+
+def _add_ng(conn, column_name, counts):
+    """Add {value: NG rows} to a column's top-k summary."""
+    summary = SpaceSaving(conn.execute(
+        "SELECT item, count, error FROM ng_topk WHERE column_name = ?", (column_name,)
+    ).fetchall())
+    summary.update(counts)
+    conn.execute("DELETE FROM ng_topk WHERE column_name = ?", (column_name,))
+    conn.executemany(
+        "INSERT INTO ng_topk (column_name, item, count, error) VALUES (?, ?, ?, ?)",
+        [(column_name,) + entry for entry in summary.top()]
+    )
+
+
+def _update_sketches(conn, rows):
+    """Add new rows to the distinct-count sketches and their NG rows to the top-k summaries."""
+    date_index = HEADER.index("Date")
+    status_index = HEADER.index("Status")
+    for column_name in SKETCH_COLUMNS:
+        col_index = HEADER.index(column_name)
+        by_month = {}
+        ng_counts = Counter()
+        for row in rows:
+            # Only the distinct values of a batch are hashed
+            by_month.setdefault(partition_key(row[date_index]), set()).add(row[col_index])
+            if row[status_index] == "NG":
+                ng_counts[row[col_index]] += 1
+        _add_distinct(conn, column_name, by_month)
+        if ng_counts:
+            _add_ng(conn, column_name, ng_counts)
+
+
+def _rebuild_ng_topk(conn):
+    """Recompute the NG top-k summaries from the rollup cube (after statuses changed in place)."""
+    conn.execute("DELETE FROM ng_topk")
+    for column_name in SKETCH_COLUMNS:
+        column = COLUMN_FOR_HEADER[column_name]
+        counts = dict(conn.execute(
+            f"SELECT {column}, SUM(count) FROM rollup WHERE status = 'NG' GROUP BY {column}"
+        ).fetchall())
+        if counts:
+            _add_ng(conn, column_name, counts)
+
+
+def _rebuild_sketches(conn):
+    """Build the sketches from the rollup cube (for stores created before them), without reading rows."""
+    conn.execute("DELETE FROM distinct_sketches")
+    for column_name in SKETCH_COLUMNS:
+        by_month = {}
+        for value_date, value in conn.execute(
+            f"SELECT DISTINCT date, {COLUMN_FOR_HEADER[column_name]} FROM rollup"
+        ):
+            by_month.setdefault(partition_key(value_date), set()).add(value)
+        _add_distinct(conn, column_name, by_month)
+    _rebuild_ng_topk(conn)
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('sketches_built', 1)")
+    conn.commit()
+
+
+def text_grams(value):
+    """Return the set of lowercased trigrams of a string."""
+    value = value.lower()
+    return {value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}
+
+
+def _text_columns():
+    """Return the SQL names of the searchable text columns."""
+    return [COLUMN_FOR_HEADER[column_name] for column_name in TEXT_COLUMNS]
+
+
+def _has_text_index(conn):
+    """Return True when the store has the full-text index (SQLite with the trigram tokenizer)."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'text_index'").fetchone() is not None
+
+
+def _index_text(conn, ids, rows):
+    """Add the text columns of new rows to the full-text index."""
+    if not _has_text_index(conn):
+        return
+    text_indexes = [HEADER.index(column_name) for column_name in TEXT_COLUMNS]
+    conn.executemany(
+        f"INSERT INTO text_index (rowid, {', '.join(_text_columns())}) VALUES ({', '.join('?' for _ in range(len(TEXT_COLUMNS) + 1))})",
+        [[row_id] + [row[col_index] for col_index in text_indexes] for row_id, row in zip(ids, rows)]
+    )
+
+
+def _rebuild_text_index(conn):
+    """Index the text columns of every stored row inside SQLite (for stores created before the index)."""
+    # Stores from before the full-text index kept trigram postings in a plain table
+    conn.execute("DROP TABLE IF EXISTS text_grams")
+    if _has_text_index(conn):
+        conn.execute("INSERT INTO text_index (text_index) VALUES ('delete-all')")
+        columns = ", ".join(_text_columns())
+        for name in partitions(conn):
+            conn.execute(f"INSERT INTO text_index (rowid, {columns}) SELECT id, {columns} FROM {name}")
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('fts_index_built', 1)")
+    conn.commit()
+
+
+def normalize_row(row, source=None):
+    """Trim or pad a row to the stored layout.
+
+    With a source, the row is a CSV row (anything past HEADER is dropped) read from that
+    file; without one it is a stored row that may already carry its Source.
+    """
+    width = len(HEADER) if source is not None else len(STORE_HEADER)
+    row = list(row[:width])
+    if len(row) < width:
+        row += [''] * (width - len(row))
+    if source is not None:
+        row.append(source)
+    return row
+
+
+def source_label(filepath):
+    """Name a station file by its folder and file name, e.g. 'station2/All_Accessories_Data.csv'."""
+    filepath = os.path.abspath(filepath)
+    return os.path.join(os.path.basename(os.path.dirname(filepath)), os.path.basename(filepath))
+
+
+def read_csv_tail(filepath, offset=0, chunk_rows=CHUNK_ROWS):
+    """Yield (rows, end_offset) batches for the complete rows after the given byte offset."""
+    with MappedCSV(filepath) as reader:
+        start = reader.find_row(offset)
+        while start < len(reader):
+            stop = min(start + chunk_rows, len(reader))
+            yield reader.rows(start, stop), reader.offsets[stop]
+            start = stop
+
+
+def _insert(conn, rows, ids=None, source=None):
+    """Insert rows into their monthly partitions without committing; source labels CSV rows."""
+    rows = [normalize_row(row, source) for row in rows]
+    if not rows:
+        return
+    if ids is None:
+        # Reserving the ids with an UPDATE first takes the write lock, so concurrent writers never share ids
+        conn.execute("UPDATE store_meta SET value = value + ? WHERE key = 'last_id'", (len(rows),))
+        last_id = conn.execute("SELECT value FROM store_meta WHERE key = 'last_id'").fetchone()[0]
+        ids = range(last_id - len(rows) + 1, last_id + 1)
+    else:
+        conn.execute("UPDATE store_meta SET value = MAX(value, ?) WHERE key = 'last_id'", (max(ids),))
+    by_partition = {}
+    for row_id, row in zip(ids, rows):
+        by_partition.setdefault(partition_key(row[0]), []).append([row_id] + row)
+    placeholders = ", ".join("?" for _ in range(len(STORE_COLUMNS) + 1))
+    for key, partition_rows in by_partition.items():
+        name = _create_partition(conn, key)
+        conn.executemany(f"INSERT INTO {name} (id, {', '.join(STORE_COLUMNS)}) VALUES ({placeholders})", partition_rows)
+    _count_values(conn, rows)
+    _count_rollup(conn, rows)
+    _index_text(conn, ids, rows)
+    _update_spc(conn, ids, rows)
+    _update_sketches(conn, rows)
+
+
+def insert_rows(conn, rows):
+    """Insert inspection rows (lists in HEADER order, optionally followed by their Source) into the store."""
+    _insert(conn, rows)
+    conn.commit()
+
+
+def source_offset(conn, filepath):
+    """Return (recorded, offset): the byte offset stored for a CSV file and the one to read it from.
+
+    They differ only when the file was truncated or replaced, which is read again from the start.
+    """
+    filepath = os.path.abspath(filepath)
+    found = conn.execute("SELECT offset FROM csv_sources WHERE path = ?", (filepath,)).fetchone()
+    recorded = found[0] if found else 0
+    return recorded, 0 if os.path.getsize(filepath) < recorded else recorded
+
+
+def read_source(filepath, offset=0, transform=None, chunk_rows=CHUNK_ROWS):
+    """Yield (rows, end_offset) for the non-blank data rows of a CSV file after a byte offset.
+
+    Needs no store connection, so worker processes can parse files for the main one to store.
+    """
+    for rows, end_offset in read_csv_tail(filepath, offset, chunk_rows):
+        if offset == 0 and rows and rows[0][:len(HEADER)] == HEADER:
+            rows = rows[1:]
+        rows = [row for row in rows if any(value.strip() for value in row)]
+        if transform is not None:
+            rows = transform(rows)
+        yield rows, end_offset
+        offset = end_offset
+
+
+def store_source_rows(conn, filepath, rows, expected_offset, end_offset):
+    """Store rows parsed from a CSV file and advance its offset, unless another import got there first.
+
+    expected_offset is the offset recorded for the file when the rows were parsed. It is checked
+    again inside the write transaction, so two connections importing the same file (the writer
+    under the station lock, a viewer reload without it) never store the same tail twice.
+    Returns whether the rows were stored.
+    """
+    filepath = os.path.abspath(filepath)
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        found = conn.execute("SELECT offset FROM csv_sources WHERE path = ?", (filepath,)).fetchone()
+        if (found[0] if found else 0) != expected_offset:
+            conn.rollback()
+            return False
+        _insert(conn, rows, source=source_label(filepath))
+        conn.execute("INSERT OR REPLACE INTO csv_sources (path, offset) VALUES (?, ?)", (filepath, end_offset))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return True
+
+
+def import_csv(conn, filepath, transform=None, chunk_rows=CHUNK_ROWS):
+    """Import the rows appended to a CSV file since its last import and return how many were added.
+
+    transform, when given, receives each chunk of raw rows and returns the rows to store.
+    """
+    imported = 0
+    expected_offset, offset = source_offset(conn, filepath)
+    for rows, end_offset in read_source(filepath, offset, transform, chunk_rows):
+        if not store_source_rows(conn, filepath, rows, expected_offset, end_offset):
+            # Another connection imported this part of the file meanwhile
+            break
+        imported += len(rows)
+        expected_offset = end_offset
+    return imported
+
+
+def last_row_id(conn):
+    """Return the id of the newest stored inspection, or 0 when the store is empty."""
+    return conn.execute("SELECT value FROM store_meta WHERE key = 'last_id'").fetchone()[0]
+
+
+def _select(conn, where="", params=(), keys=None):
+    """Yield (id, *row) from every relevant partition, merged in id order."""
+    cursors = [
+        conn.execute(f"SELECT id, {', '.join(STORE_COLUMNS)} FROM {name}{where} ORDER BY id", params)
+        for name in partitions(conn, keys)
+    ]
+    return heapq.merge(*cursors)
+
+
+def fetch_new_rows(conn, after_id):
+    """Return the rows stored after the given id together with the newest id seen."""
+    found = list(_select(conn, " WHERE id > ?", (after_id,)))
+    if not found:
+        return [], after_id
+    return [row[1:] for row in found], found[-1][0]
+
+
+def export_csv(conn, filepath):
+    """Write every stored inspection to a CSV file in the original column layout."""
+    with open(filepath, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for row in _select(conn):
+            writer.writerow(row[1:1 + len(HEADER)])
+
+
+def row_count(conn):
+    """Return the number of stored inspections."""
+    return sum(conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for name in partitions(conn))
+
+
+def iter_query(conn, query):
+    """Yield the rows matching a query one at a time, so a long read can be stopped early."""
+    where, params = query.sql()
+    for row in _select(conn, where, params, query.partition_filter()):
+        yield row[1:]
+
+
+def iter_sorted(conn, column_name, query, descending=False):
+    """Yield the rows matching a query ordered by a column, ties in id order.
+
+    Each partition is read in the order of its index on the column and the partitions are
+    merged, so nothing is sorted and a caller that stops early reads only what it used.
+    """
+    column = COLUMN_FOR_HEADER[column_name]
+    position = STORE_COLUMNS.index(column) + 1
+    direction = "DESC" if descending else "ASC"
+    where, params = query.sql()
+    cursors = [
+        conn.execute(f"SELECT id, {', '.join(STORE_COLUMNS)} FROM {name}{where} ORDER BY {column} {direction}, id {direction}", params)
+        for name in partitions(conn, query.partition_filter())
+    ]
+    for row in heapq.merge(*cursors, key=lambda row: (row[position], row[0]), reverse=descending):
+        yield row[1:]
+
+
+def rescore_status(conn, score, query):
+    """Recompute the Status of the rows matching a query and return how many changed.
+
+    score(observations, specifications) returns a status per row; rows it cannot judge
+    (an empty status) keep theirs. The rollup cube is adjusted in the same transaction.
+    """
+    observation_index = HEADER.index("Observation")
+    specification_index = HEADER.index("Specification")
+    status_index = HEADER.index("Status")
+    where, params = query.sql()
+    changed = 0
+    for name in partitions(conn, query.partition_filter()):
+        found = conn.execute(f"SELECT id, {', '.join(STORE_COLUMNS)} FROM {name}{where}", params).fetchall()
+        if not found:
+            continue
+        statuses = score([row[1 + observation_index] for row in found], [row[1 + specification_index] for row in found])
+        updates, old_rows, new_rows = [], [], []
+        for row, status in zip(found, statuses):
+            status = str(status)
+            if status and status != row[1 + status_index]:
+                updates.append((status, row[0]))
+                old_rows.append(row[1:])
+                new_rows.append(row[1:1 + status_index] + (status,) + row[2 + status_index:])
+        conn.executemany(f"UPDATE {name} SET status = ? WHERE id = ?", updates)
+        _count_rollup(conn, old_rows, sign=-1)
+        _count_rollup(conn, new_rows)
+        changed += len(updates)
+    conn.execute("DELETE FROM rollup WHERE count = 0")
+    if changed:
+        # Space-Saving counters only grow, so NG counts that went down are recounted from the cube
+        _rebuild_ng_topk(conn)
+    conn.commit()
+    return changed
+
+
+def rollup_counts(conn, dimensions, query):
+    """Return (*dimension values, count) tuples from the rollup cube, or None when it cannot answer.
+
+    The cube answers when every dimension and every query predicate is on a cube column.
+    """
+    if any(column_name not in CUBE_COLUMNS for column_name in list(dimensions) + query.columns()):
+        return None
+    group = ", ".join(COLUMN_FOR_HEADER[column_name] for column_name in dimensions)
+    where, params = query.sql()
+    return conn.execute(f"SELECT {group}, SUM(count) FROM rollup{where} GROUP BY {group}", params).fetchall()
+
+
+def text_matches(row, text):
+    """Return True when any text column of a row contains the text, ignoring case."""
+    text = text.lower()
+    return any(text in row[HEADER.index(column_name)].lower() for column_name in TEXT_COLUMNS)
+
+
+def iter_search(conn, text, query):
+    """Yield the rows matching a query whose Parameter, Observation or Remark contains the text.
+
+    Rows holding every trigram of the text are looked up in the full-text index and only those
+    are read and checked; text shorter than a trigram, or a store without the index, falls back
+    to checking every queried row.
+    """
+    grams = sorted(text_grams(text))
+    if not grams or not _has_text_index(conn):
+        for row in iter_query(conn, query):
+            if text_matches(row, text):
+                yield row
+        return
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS search_hits (row_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM search_hits")
+    conn.execute(
+        "INSERT INTO search_hits (row_id) SELECT rowid FROM text_index WHERE text_index MATCH ?",
+        (" AND ".join('"' + gram.replace('"', '""') + '"' for gram in grams),)
+    )
+    # Ends the implicit transaction the temp-table write opened, so later reads see new rows
+    conn.commit()
+    where, params = query.sql()
+    where += (" AND " if where else " WHERE ") + "id IN (SELECT row_id FROM temp.search_hits)"
+    for row in _select(conn, where, params, query.partition_filter()):
+        # Every trigram being present does not guarantee they are adjacent, so check the text itself
+        if text_matches(row[1:], text):
+            yield row[1:]
+
+
+def spc_stats(conn, fixture_number=None):
+    """Return the running SPC statistics rows, optionally for one fixture.
+
+    Each row is (fixture_no, accessory_no, parameter, specification, n, mean, m2, mr_sum, mr_count).
+    """
+    where, params = (" WHERE fixture_no = ?", [fixture_number]) if fixture_number else ("", [])
+    return conn.execute(
+        "SELECT fixture_no, accessory_no, parameter, specification, n, mean, m2, mr_sum, mr_count "
+        f"FROM spc_stats{where} ORDER BY fixture_no, accessory_no, parameter", params
+    ).fetchall()
+
+
+def spc_points(conn, fixture_number, accessory_number, parameter):
+    """Return the latest (date, value) observations of one parameter, oldest first."""
+    return conn.execute(
+        "SELECT date, value FROM spc_points WHERE fixture_no = ? AND accessory_no = ? AND parameter = ? ORDER BY row_id",
+        (fixture_number, accessory_number, parameter)
+    ).fetchall()
+
+
+def sketch_months(conn):
+    """Return the month keys (YYYY_MM, plus UNDATED) that have distinct-count sketches, oldest first."""
+    return [month for (month,) in conn.execute("SELECT DISTINCT month FROM distinct_sketches ORDER BY month")]
+
+
+def distinct_estimate(conn, column_name, months=None):
+    """Return the approximate number of distinct values of a sketched column over some months or all time.
+
+    The months' sketches are merged, so a value seen in several months is counted once.
+    """
+    sketch = HyperLogLog()
+    for month, registers in conn.execute(
+        "SELECT month, registers FROM distinct_sketches WHERE column_name = ?", (column_name,)
+    ):
+        if months is None or month in months:
+            sketch.merge(HyperLogLog(registers))
+    return sketch.count()
+
+
+def ng_hotspots(conn, column_name, count=20):
+    """Return the (value, NG count, possible overcount) tuples with the most NG rows, highest first."""
+    return conn.execute(
+        "SELECT item, count, error FROM ng_topk WHERE column_name = ? ORDER BY count DESC, item LIMIT ?",
+        (column_name, count)
+    ).fetchall()
+
+
+def value_counts(conn, column_name, fixture_number=None):
+    """Return (value, count) pairs of a tracked column, for one fixture or summed over all of them."""
+    if fixture_number:
+        return conn.execute(
+            "SELECT value, count FROM value_counts WHERE fixture_no = ? AND column_name = ? ORDER BY value",
+            (fixture_number, column_name)
+        ).fetchall()
+    return conn.execute(
+        "SELECT value, SUM(count) FROM value_counts WHERE column_name = ? GROUP BY value ORDER BY value",
+        (column_name,)
+    ).fetchall()
+
+
+def distinct_values(conn, column_name, fixture_number=None):
+    """Return the sorted distinct values of a column, optionally for one fixture."""
+    if column_name in COUNTED_COLUMNS:
+        return [value for value, _ in value_counts(conn, column_name, fixture_number)]
+    column = COLUMN_FOR_HEADER[column_name]
+    where, params = (" WHERE fixture_no = ?", [fixture_number]) if fixture_number else ("", [])
+    values = set()
+    for name in partitions(conn):
+        values.update(value for (value,) in conn.execute(f"SELECT DISTINCT {column} FROM {name}{where}", params))
+    return sorted(values)
@@ -0,0 +1,168 @@
+from array import array
+
+from bitmap_index import BitmapIndex, all_rows_bitmap, bitmap_rows, rows_bitmap
+from inspection_store import STORE_HEADER
+
+# Columns that repeat heavily and are stored as integer codes into a per-column dictionary;
+# Observation and Remark are mostly unique free text and are kept as plain strings.
+ENCODED_COLUMNS = ["Date", "Machine No.", "Operation", "Fixture No.", "Accessory No.", "Accessory Name",
+                   "Parameter", "Specification", "Inspection Instrument", "Status", "Source"]
+
+
+class InspectionTable:
+    """Column-oriented, dictionary-encoded container for inspection rows.
+
+    Encoded columns hold one 32-bit code per row in an array('I') plus a list of the distinct
+    values, so a repeated value is stored once however many rows use it. Rows are rebuilt as
+    tuples on access, which is what the Treeview and the filters need.
+    """
+
+    def __init__(self, header=STORE_HEADER):
+        self.header = list(header)
+        self.encoded = [name in ENCODED_COLUMNS for name in self.header]
+        self.codes = [array('I') if encoded else None for encoded in self.encoded]
+        self.values = [[] for _ in self.header]
+        self.lookup = [{} if encoded else None for encoded in self.encoded]
+        self.length = 0
+        # Bitmap indexes keyed by code, built for a column the first time it is filtered
+        self.indexes = {}
+        # Sorted permutations of the row ids per (column, descending), with the row count they cover
+        self.orders = {}
+
+    def __len__(self):
+        return self.length
+
+    def _column_index(self, column):
+        """Accept either a column name or a column index."""
+        return self.header.index(column) if isinstance(column, str) else column
+
+    def append(self, row):
+        """Add one row (a sequence in header order, padded or trimmed to the header)."""
+        row = list(row[:len(self.header)])
+        row += [''] * (len(self.header) - len(row))
+        for col_index, value in enumerate(row):
+            if self.encoded[col_index]:
+                lookup = self.lookup[col_index]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(self.values[col_index])
+                    self.values[col_index].append(value)
+                self.codes[col_index].append(code)
+            else:
+                self.values[col_index].append(value)
+        for col_index, index in self.indexes.items():
+            index.add(self.codes[col_index][self.length], self.length)
+        self.length += 1
+
+    def row(self, row_id):
+        """Rebuild one row as a tuple of strings."""
+        return tuple(
+            self.values[col_index][self.codes[col_index][row_id]] if self.encoded[col_index] else self.values[col_index][row_id]
+            for col_index in range(len(self.header))
+        )
+
+    def __getitem__(self, row_id):
+        if row_id < 0:
+            row_id += self.length
+        if not 0 <= row_id < self.length:
+            raise IndexError(row_id)
+        return self.row(row_id)
+
+    def __iter__(self):
+        for row_id in range(self.length):
+            yield self.row(row_id)
+
+    def view(self, row_ids):
+        """Return a lazy sequence of the rows with the given ids."""
+        return RowSelection(self, row_ids)
+
+    def where_in(self, column, wanted):
+        """Return the ids of the rows whose value in a column is one of the wanted values."""
+        col_index = self._column_index(column)
+        if self.encoded[col_index]:
+            lookup = self.lookup[col_index]
+            wanted_codes = {lookup[value] for value in wanted if value in lookup}
+            return [row_id for row_id, code in enumerate(self.codes[col_index]) if code in wanted_codes]
+        wanted = set(wanted)
+        return [row_id for row_id, value in enumerate(self.values[col_index]) if value in wanted]
+
+    def bitmap_index(self, column):
+        """Return the bitmap index of an encoded column, building it on first use."""
+        col_index = self._column_index(column)
+        index = self.indexes.get(col_index)
+        if index is None:
+            index = BitmapIndex()
+            for row_id, code in enumerate(self.codes[col_index]):
+                index.add(code, row_id)
+            self.indexes[col_index] = index
+        return index
+
+    def match(self, selections):
+        """Return the ids of the rows matching every {column: wanted values} selection.
+
+        Each column's wanted values are a bitmap union and the columns are intersected;
+        columns with no wanted values do not filter.
+        """
+        result = all_rows_bitmap(self.length)
+        for column, wanted in selections.items():
+            if not wanted:
+                continue
+            col_index = self._column_index(column)
+            if not self.encoded[col_index]:
+                result &= rows_bitmap(self.where_in(col_index, wanted))
+                continue
+            lookup = self.lookup[col_index]
+            result &= self.bitmap_index(col_index).union(lookup[value] for value in wanted if value in lookup)
+        return bitmap_rows(result)
+
+    def sort_order(self, column, descending=False):
+        """Return every row id ordered by a column's value, ties in row order.
+
+        Encoded columns only sort their distinct values and then bucket the row ids by code,
+        so the permutation costs one pass over the rows. It is kept until rows are added.
+        """
+        col_index = self._column_index(column)
+        cached = self.orders.get((col_index, descending))
+        if cached is not None and cached[0] == self.length:
+            return cached[1]
+        values = self.values[col_index]
+        if self.encoded[col_index]:
+            rank_of = [0] * len(values)
+            for rank, code in enumerate(sorted(range(len(values)), key=values.__getitem__, reverse=descending)):
+                rank_of[code] = rank
+            buckets = [[] for _ in values]
+            for row_id, code in enumerate(self.codes[col_index]):
+                buckets[rank_of[code]].append(row_id)
+            order = [row_id for bucket in buckets for row_id in bucket]
+        else:
+            order = sorted(range(self.length), key=values.__getitem__, reverse=descending)
+        self.orders[(col_index, descending)] = (self.length, order)
+        return order
+
+    def sorted_ids(self, row_ids, column, descending=False):
+        """Return the given row ids ordered by a column, by walking the column's sorted permutation."""
+        order = self.sort_order(column, descending)
+        if len(row_ids) == self.length:
+            return list(order)
+        wanted = bytearray(self.length)
+        for row_id in row_ids:
+            wanted[row_id] = 1
+        return [row_id for row_id in order if wanted[row_id]]
+
+
+class RowSelection:
+    """Some of a table's rows by id, rebuilt one at a time when indexed.
+
+    The viewer hands this to the virtual Treeview so a large filter result never
+    materializes its rows; row_ids may be appended to as matching rows arrive.
+    """
+
+    def __init__(self, table, row_ids):
+        self.table = table
+        self.row_ids = row_ids
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def __getitem__(self, index):
+        return self.table.row(self.row_ids[index])
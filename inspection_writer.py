@@ -0,0 +1,123 @@
+import csv
+import io
+import os
+import queue
+import threading
+
+import inspection_store
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+POLL_INTERVAL_MS = 100
+MAX_BATCH = 500
+
+
+def lock_file(file):
+    """Take an exclusive OS-level lock on an open lock file, waiting for other stations."""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        # LK_LOCK retries for about 10 seconds before raising, so keep trying while another station writes
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def unlock_file(file):
+    """Release a lock taken with lock_file()."""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class InspectionWriter:
+    """Append inspection rows to the shared CSV file on a background thread.
+
+    Submissions are queued, grouped into one locked append with a single fsync per batch,
+    then imported into the inspection store. Completion callbacks run on the Tk thread via after().
+    """
+
+    def __init__(self, csv_path, store_path=inspection_store.STORE_PATH):
+        self.csv_path = csv_path
+        self.store_path = store_path
+        self.pending = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="inspection-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, rows, on_done=None):
+        """Queue rows for writing; on_done(error) is called on the Tk thread once they are on disk."""
+        self.pending.put((list(rows), on_done))
+
+    def poll(self, root):
+        """Deliver finished submissions to their callbacks and reschedule on the Tk event loop."""
+        while True:
+            try:
+                on_done, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if on_done is not None:
+                on_done(error)
+        if root.winfo_exists():
+            root.after(POLL_INTERVAL_MS, self.poll, root)
+
+    def close(self):
+        """Write everything still queued and stop the background thread."""
+        self.pending.put(None)
+        self.thread.join()
+
+    def _run(self):
+        """Wait for submissions and write them in batches until closed."""
+        store = None
+        stopping = False
+        while not stopping:
+            batch = [self.pending.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+            try:
+                if store is None:
+                    store = inspection_store.open_store(self.store_path)
+                self._write_batch([row for rows, _ in batch for row in rows], store)
+                error = None
+            except Exception as e:
+                error = e
+            for _, on_done in batch:
+                self.results.put((on_done, error))
+        if store is not None:
+            store.close()
+
+    def _write_batch(self, rows, store):
+        """Append rows to the CSV file with one fsync and import them, all under the station lock."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        with open(self.csv_path + ".lock", mode='a+') as lock:
+            lock_file(lock)
+            try:
+                with open(self.csv_path, mode='a', newline='', encoding='utf-8') as file:
+                    if file.tell() == 0:
+                        csv.writer(file).writerow(inspection_store.HEADER)
+                    file.write(buffer.getvalue())
+                    file.flush()
+                    os.fsync(file.fileno())
+                inspection_store.import_csv(store, self.csv_path)
+            finally:
+                unlock_file(lock)
@@ -0,0 +1,68 @@
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
+
+
+class PivotChart:
+    """Stacked bar chart embedded in a Tk container and redrawn in place.
+
+    The figure and canvas live as long as the pivot window. When a new pivot has the same
+    row and column labels as the one shown, only the bar heights and offsets change;
+    otherwise the axes are cleared and the bars rebuilt. Either way the canvas is redrawn
+    with draw_idle(), so no figures pile up between charts.
+    """
+
+    def __init__(self, master):
+        self.figure = Figure(figsize=(8, 5), dpi=100)
+        self.axes = self.figure.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.bars = []
+        self.layout = None
+
+    def add_toolbar(self, master):
+        """Add the matplotlib zoom/pan/save toolbar to a container of its own."""
+        toolbar = NavigationToolbar2Tk(self.canvas, master, pack_toolbar=False)
+        toolbar.update()
+        return toolbar
+
+    def show(self, pivot_table, title, xlabel, ylabel):
+        """Draw a pivot table as stacked bars, one stack per row and one colour per column."""
+        index = [str(label) for label in pivot_table.index]
+        columns = [str(label) for label in pivot_table.columns]
+        values = pivot_table.to_numpy(dtype=float)
+        if (index, columns) == self.layout:
+            self._update(values)
+        else:
+            self._rebuild(index, columns, values)
+        self.axes.set_title(title)
+        self.axes.set_xlabel(xlabel)
+        self.axes.set_ylabel(ylabel)
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.canvas.draw_idle()
+
+    def _rebuild(self, index, columns, values):
+        """Clear the axes and create the bars for a new set of labels."""
+        self.axes.clear()
+        positions = np.arange(len(index))
+        bottom = np.zeros(len(index))
+        self.bars = []
+        for col_index, label in enumerate(columns):
+            self.bars.append(self.axes.bar(positions, values[:, col_index], bottom=bottom, label=label))
+            bottom = bottom + values[:, col_index]
+        self.axes.set_xticks(positions)
+        self.axes.set_xticklabels(index, rotation=45, ha='right')
+        if columns:
+            self.axes.legend(fontsize='small')
+        self.figure.tight_layout()
+        self.layout = (index, columns)
+
+    def _update(self, values):
+        """Move the existing bars to new heights without recreating them."""
+        bottom = np.zeros(values.shape[0])
+        for col_index, bars in enumerate(self.bars):
+            for rect, height, base in zip(bars.patches, values[:, col_index], bottom):
+                rect.set_height(height)
+                rect.set_y(base)
+            bottom = bottom + values[:, col_index]
@@ -0,0 +1,238 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import inspection_store
+from bulk_ingest import parse_dates
+
+try:
+    import pyarrow  # noqa: F401  (Feather support in pandas)
+    PART_EXTENSION = ".feather"
+except ImportError:
+    PART_EXTENSION = ".npz"
+
+SNAPSHOT_DIR = os.path.splitext(inspection_store.STORE_PATH)[0] + "_columns"
+META_FILENAME = "snapshot.json"
+MAX_PARTS = 32
+# Repeating identifier columns held as pandas categoricals in the typed columns
+CATEGORY_COLUMNS = ["Machine No.", "Operation", "Fixture No.", "Accessory No.", "Accessory Name",
+                    "Parameter", "Specification", "Inspection Instrument", "Status", "Source"]
+
+# Categories beyond this many on a chart axis are merged into OTHER_LABEL
+MAX_CATEGORIES = 20
+OTHER_LABEL = "Other"
+
+# Typed columns of the snapshot's part files by (directory, part file, column), converted on first use
+_typed_cache = {}
+
+
+def _read_meta(directory):
+    """Return the snapshot metadata, or an empty snapshot when there is none."""
+    try:
+        with open(os.path.join(directory, META_FILENAME)) as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return {"last_id": 0, "parts": []}
+    # Parts written before date spans were recorded are never pruned
+    meta["parts"] = [part if isinstance(part, dict) else {"file": part, "first": "", "last": "\uffff"}
+                     for part in meta["parts"]]
+    return meta
+
+
+def _write_meta(directory, meta):
+    """Atomically replace the snapshot metadata."""
+    temp_path = os.path.join(directory, META_FILENAME + ".tmp")
+    with open(temp_path, mode='w') as file:
+        json.dump(meta, file)
+    os.replace(temp_path, os.path.join(directory, META_FILENAME))
+
+
+def _write_part(directory, name, frame):
+    """Write one columnar part file and return its catalog entry with the part's date span."""
+    filename = name + PART_EXTENSION
+    path = os.path.join(directory, filename)
+    if PART_EXTENSION == ".feather":
+        frame.reset_index(drop=True).to_feather(path)
+    else:
+        np.savez(path, **{col: frame[col].to_numpy(dtype=str) for col in frame.columns})
+    dates = frame["Date"].astype(str)
+    return {"file": filename, "first": dates.min(), "last": dates.max()}
+
+
+def _read_part(directory, filename, columns):
+    """Read only the requested columns of one part file."""
+    path = os.path.join(directory, filename)
+    if filename.endswith(".feather"):
+        return pd.read_feather(path, columns=columns)
+    with np.load(path) as part:
+        return pd.DataFrame({col: part[col] for col in columns})
+
+
+def refresh_snapshot(store, directory=SNAPSHOT_DIR):
+    """Add the rows stored since the last refresh as a new part; return how many were added."""
+    os.makedirs(directory, exist_ok=True)
+    meta = _read_meta(directory)
+    stale_columns = meta["parts"] and meta.get("columns") != inspection_store.STORE_HEADER
+    if meta["last_id"] > inspection_store.last_row_id(store) or stale_columns:
+        # The store was rebuilt or gained columns, so the snapshot no longer matches it
+        for part in meta["parts"]:
+            os.remove(os.path.join(directory, part["file"]))
+        meta = {"last_id": 0, "parts": []}
+    meta["columns"] = inspection_store.STORE_HEADER
+    rows, last_id = inspection_store.fetch_new_rows(store, meta["last_id"])
+    if not rows:
+        return 0
+    frame = pd.DataFrame(rows, columns=inspection_store.STORE_HEADER)
+    meta["parts"].append(_write_part(directory, f"part-{last_id:012d}", frame))
+    meta["last_id"] = last_id
+    old_parts = []
+    if len(meta["parts"]) > MAX_PARTS:
+        # Merge the small parts left by frequent refreshes into one
+        merged = load_columns(inspection_store.STORE_HEADER, directory, meta["parts"])
+        old_parts, meta["parts"] = meta["parts"], [_write_part(directory, f"merged-{last_id:012d}", merged)]
+    _write_meta(directory, meta)
+    for part in old_parts:
+        os.remove(os.path.join(directory, part["file"]))
+    return len(rows)
+
+
+def clear_snapshot(directory=SNAPSHOT_DIR):
+    """Remove the snapshot so the next refresh rebuilds it (after stored rows were changed in place)."""
+    for part in _read_meta(directory)["parts"]:
+        try:
+            os.remove(os.path.join(directory, part["file"]))
+        except OSError:
+            pass
+    if os.path.isdir(directory):
+        _write_meta(directory, {"last_id": 0, "parts": []})
+    _typed_cache.clear()
+
+
+def load_columns(columns, directory=SNAPSHOT_DIR, parts=None, query=None):
+    """Load only the given columns of the snapshot into one DataFrame.
+
+    With an inspection_query.Query, parts whose dates fall entirely outside the query's date
+    bounds are not read, and the remaining rows are filtered by its predicates.
+    """
+    columns = list(dict.fromkeys(columns))
+    if parts is None:
+        parts = _read_meta(directory)["parts"]
+    read_columns = columns
+    if query is not None:
+        parts = _parts_in_range(parts, query)
+        read_columns = list(dict.fromkeys(columns + query.columns()))
+    frames = [_read_part(directory, part["file"], read_columns) for part in parts]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    frame = pd.concat(frames, ignore_index=True)
+    if query is not None and query.predicates:
+        frame = frame[query.mask(frame)][columns].reset_index(drop=True)
+    return frame
+
+
+def _parts_in_range(parts, query):
+    """Drop the parts whose dates fall entirely outside an inspection_query.Query's date bounds."""
+    first, last = query.date_bounds()
+    return [part for part in parts if (not first or part["last"] >= first) and (not last or part["first"] <= last)]
+
+
+def _typed_column(column, values):
+    """Convert one snapshot column of strings to parsed dates, a categorical, numeric Observation or text."""
+    if column == "Date":
+        return pd.to_datetime(parse_dates(values.astype(str)), format='%Y-%m-%d')
+    if column in CATEGORY_COLUMNS:
+        return values.astype(str).astype("category")
+    if column == "Observation":
+        return pd.to_numeric(values, errors='coerce')
+    return values.astype(str)
+
+
+def _concat_typed(column, pieces):
+    """Concatenate the typed pieces of one column, merging categories so categoricals stay categorical."""
+    if column in CATEGORY_COLUMNS and len(pieces) > 1:
+        return pd.Series(pd.api.types.union_categoricals(pieces, ignore_order=True), name=column)
+    return pd.concat(pieces, ignore_index=True)
+
+
+def load_typed(columns, query=None, directory=SNAPSHOT_DIR):
+    """Return the given columns with typed values, limited to the rows matching an inspection_query.Query.
+
+    Only the requested and queried columns of the parts within the query's date bounds are read.
+    Each part's column is converted once and reused by later pivots until the part is merged away.
+    """
+    columns = list(dict.fromkeys(columns))
+    parts = _read_meta(directory)["parts"]
+    current = {part["file"] for part in parts}
+    for key in [key for key in _typed_cache if key[0] != directory or key[1] not in current]:
+        del _typed_cache[key]
+    read_columns = columns
+    if query is not None:
+        parts = _parts_in_range(parts, query)
+        read_columns = list(dict.fromkeys(columns + query.columns()))
+    pieces = {column: [] for column in read_columns}
+    for part in parts:
+        missing = [column for column in read_columns if (directory, part["file"], column) not in _typed_cache]
+        if missing:
+            raw = _read_part(directory, part["file"], missing)
+            for column in missing:
+                _typed_cache[(directory, part["file"], column)] = _typed_column(column, raw[column])
+        for column in read_columns:
+            pieces[column].append(_typed_cache[(directory, part["file"], column)])
+    frame = pd.DataFrame({
+        column: _concat_typed(column, column_pieces) if column_pieces else _typed_column(column, pd.Series([], dtype=str))
+        for column, column_pieces in pieces.items()
+    })
+    if query is not None and query.predicates:
+        frame = frame[query.mask(frame)]
+    return frame[columns].reset_index(drop=True)
+
+
+def collapse_tail(frame, column, keep=MAX_CATEGORIES, weights=None):
+    """Replace all but the keep most frequent values of a column with OTHER_LABEL.
+
+    Frequency is the number of rows, or the sum of weights (e.g. rollup counts) when given.
+    The collapse happens before pivoting, so every aggregation sees the merged bucket.
+    """
+    values = frame[column].astype(str)
+    totals = values.value_counts() if weights is None else weights.groupby(values).sum()
+    if len(totals) <= keep:
+        return frame
+    top = totals.nlargest(keep - 1).index
+    frame = frame.copy()
+    frame[column] = values.where(values.isin(top), OTHER_LABEL)
+    return frame
+
+
+def build_pivot(store, row, col, value, aggfunc, query):
+    """Return the pivot table charted for the given Row, Column, Value and aggregation.
+
+    Counts come from the rollup cube when it covers the dimensions and filters; everything
+    else is pivoted from the cached typed columns. Long tails on non-date axes are collapsed first.
+    Raises ValueError when a non-count aggregation is asked of a non-numeric Value column.
+    """
+    counts = None
+    if aggfunc == "count" and row != col:
+        # Counts are additive, so the rollup cube kept up to date on every insert answers them
+        counts = inspection_store.rollup_counts(store, [row, col], query)
+    if counts is not None:
+        frame = pd.DataFrame(counts, columns=[row, col, "Count"])
+        for axis in {row, col} - {"Date"}:
+            frame = collapse_tail(frame, axis, weights=frame["Count"])
+        return pd.pivot_table(frame, values="Count", index=row, columns=col, aggfunc="sum", fill_value=0)
+
+    # Only the pivoted columns of the parts in range are read, each converted once and then cached
+    refresh_snapshot(store)
+    frame = load_typed([row, col, value], query=query)
+    if aggfunc != "count" and not pd.api.types.is_numeric_dtype(frame[value]):
+        raise ValueError(f"'{aggfunc}' needs a numeric Value column such as Observation.")
+    for axis in {row, col} - {"Date"}:
+        frame = collapse_tail(frame, axis)
+    pivot_table = pd.pivot_table(frame, values=value, index=row, columns=col, aggfunc=aggfunc,
+                                 fill_value=0, observed=True)
+    if row == "Date":
+        pivot_table.index = pivot_table.index.strftime('%Y-%m-%d')
+    if col == "Date":
+        pivot_table.columns = pivot_table.columns.strftime('%Y-%m-%d')
+    return pivot_table
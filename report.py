@@ -0,0 +1,137 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+import inspection_query
+import inspection_store
+import pivot_snapshot
+import spc
+
+REPORT_DIR = "reports"
+# (Row, Column) count pivots drawn for each fixture and for each machine
+FIXTURE_PAGES = [("Date", "Status"), ("Machine No.", "Status"), ("Accessory No.", "Status")]
+MACHINE_PAGES = [("Date", "Status"), ("Fixture No.", "Status")]
+SPC_TABLE_COLUMNS = ["Accessory No.", "Parameter", "Specification", "n", "Mean", "Std Dev", "Cp", "Cpk"]
+SPC_ROWS_PER_PAGE = 30
+
+
+def _safe_name(value):
+    """Make a fixture or machine number usable in a file name."""
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in value) or "blank"
+
+
+def _pivot_page(store, title, row, col, query):
+    """Return a figure with one count pivot drawn as stacked bars, or None when nothing matches."""
+    pivot_table = pivot_snapshot.build_pivot(store, row, col, col, "count", query)
+    if pivot_table.empty:
+        return None
+    figure = Figure(figsize=(11, 8.5))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(111)
+    pivot_table.plot(kind='bar', stacked=True, ax=axes)
+    axes.set_title(title)
+    axes.set_xlabel(row)
+    axes.set_ylabel("Count")
+    figure.tight_layout()
+    return figure
+
+
+def _spc_pages(store, fixture_number):
+    """Return figures holding the SPC summary table of a fixture's parameters."""
+    rows = []
+    for stats in inspection_store.spc_stats(store, fixture_number):
+        summary = spc.summarize(stats)
+        rows.append([summary["accessory"], summary["parameter"], summary["specification"], str(summary["n"]),
+                     spc.format_number(summary["mean"]), spc.format_number(summary["stdev"]),
+                     spc.format_number(summary["cp"], 3), spc.format_number(summary["cpk"], 3)])
+    figures = []
+    for start in range(0, len(rows), SPC_ROWS_PER_PAGE):
+        figure = Figure(figsize=(11, 8.5))
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot(111)
+        axes.axis('off')
+        axes.set_title(f"Fixture {fixture_number}: SPC summary")
+        table = axes.table(cellText=rows[start:start + SPC_ROWS_PER_PAGE], colLabels=SPC_TABLE_COLUMNS, loc='upper center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(8)
+        figures.append(figure)
+    return figures
+
+
+def render_report(job):
+    """Render the pages of one fixture or machine and write them; runs in a worker process.
+
+    job is (kind, number, store_path, output_dir, file_format, first_date, last_date);
+    returns the paths written.
+    """
+    kind, number, store_path, output_dir, file_format, first_date, last_date = job
+    store = inspection_store.open_store_readonly(store_path)
+    column = "Fixture No." if kind == "fixture" else "Machine No."
+    query = inspection_query.Query(inspection_query.equals(column, number),
+                                   *inspection_query.date_range(first_date, last_date))
+    pages = FIXTURE_PAGES if kind == "fixture" else MACHINE_PAGES
+    figures = [_pivot_page(store, f"{column} {number}: OK/NG by {row}", row, col, query) for row, col in pages]
+    figures = [figure for figure in figures if figure is not None]
+    if kind == "fixture":
+        figures.extend(_spc_pages(store, number))
+    store.close()
+
+    base = os.path.join(output_dir, f"{kind}_{_safe_name(number)}")
+    if file_format == "pdf":
+        with PdfPages(base + ".pdf") as pdf:
+            for figure in figures:
+                pdf.savefig(figure)
+        return [base + ".pdf"] if figures else []
+    written = []
+    for page, figure in enumerate(figures, start=1):
+        figure.savefig(f"{base}_{page:02d}.png", dpi=100)
+        written.append(f"{base}_{page:02d}.png")
+    return written
+
+
+def run_reports(store_path=inspection_store.STORE_PATH, output_dir=REPORT_DIR, file_format="pdf",
+                fixtures=None, machines=None, first_date="", last_date="", workers=None):
+    """Render the fixture and machine reports over a process pool and return the files written."""
+    os.makedirs(output_dir, exist_ok=True)
+    # Opening the store once here brings its indexes and rollups up to date before the workers read it
+    store = inspection_store.open_store(store_path)
+    fixtures = fixtures or inspection_store.distinct_values(store, "Fixture No.")
+    machines = machines or inspection_store.distinct_values(store, "Machine No.")
+    store.close()
+    jobs = [("fixture", number, store_path, output_dir, file_format, first_date, last_date) for number in fixtures]
+    jobs += [("machine", number, store_path, output_dir, file_format, first_date, last_date) for number in machines]
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for paths in pool.map(render_report, jobs):
+            written.extend(paths)
+    return written
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Render per-fixture and per-machine inspection reports without the GUI.")
+    parser.add_argument("--store", default=inspection_store.STORE_PATH, help="SQLite inspection store to report on")
+    parser.add_argument("--output", default=REPORT_DIR, help="directory that receives the report files")
+    parser.add_argument("--format", choices=["pdf", "png"], default="pdf",
+                        help="one multi-page PDF per fixture/machine, or one PNG per page")
+    parser.add_argument("--fixture", action="append", help="only report this fixture (repeatable)")
+    parser.add_argument("--machine", action="append", help="only report this machine (repeatable)")
+    parser.add_argument("--from-date", default="", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--to-date", default="", help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+    # Rejects bad dates before any worker starts
+    inspection_query.date_range(args.from_date, args.to_date)
+    started = time.perf_counter()
+    written = run_reports(args.store, args.output, args.format, args.fixture, args.machine,
+                          args.from_date, args.to_date, args.workers)
+    print(f"Wrote {len(written)} files to {args.output} in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
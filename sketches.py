@@ -0,0 +1,95 @@
+import hashlib
+import math
+
+# 2**12 one-byte registers: 4 KB per sketch and about 1.6% standard error on distinct counts
+HLL_PRECISION = 12
+# Items tracked per Space-Saving summary; the top 20 of them are reliable for skewed NG counts
+TOPK_CAPACITY = 100
+
+
+def _hash64(value):
+    """Return a stable 64-bit hash of a string (Python's hash() changes between runs)."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Approximate distinct counter in a fixed number of registers.
+
+    Each value's hash picks a register by its first bits, which keeps the longest run of
+    leading zeros seen in the rest. Sketches of the same precision merge by register-wise
+    maximum, so per-month sketches combine into any range of months.
+    """
+
+    def __init__(self, registers=None, precision=HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add(self, value):
+        """Count one value."""
+        hashed = _hash64(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        """Count many values."""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one."""
+        self.registers = bytearray(max(pair) for pair in zip(self.registers, other.registers))
+
+    def count(self):
+        """Return the estimated number of distinct values."""
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        """Return the registers for storage."""
+        return bytes(self.registers)
+
+
+class SpaceSaving:
+    """Top-k summary of weighted counts in at most capacity counters.
+
+    A new item takes over the smallest counter when all are used, inheriting its count as
+    the item's possible overestimate (error). Any item whose true count exceeds the total
+    divided by capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, counters=None, capacity=TOPK_CAPACITY):
+        self.capacity = capacity
+        # item -> [count, error]
+        self.counters = {item: [count, error] for item, count, error in counters or []}
+
+    def add(self, item, weight=1):
+        """Count an item weight times."""
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+        else:
+            smallest = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(smallest)[0]
+            self.counters[item] = [floor + weight, floor]
+
+    def update(self, counts):
+        """Count a {item: weight} mapping, heaviest first so large items claim counters early."""
+        for item, weight in sorted(counts.items(), key=lambda pair: (-pair[1], pair[0])):
+            self.add(item, weight)
+
+    def top(self, count=None):
+        """Return (item, count, error) tuples, highest count first."""
+        found = sorted(((item, value, error) for item, (value, error) in self.counters.items()),
+                       key=lambda entry: (-entry[1], entry[0]))
+        return found if count is None else found[:count]
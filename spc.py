@@ -0,0 +1,40 @@
+import math
+
+from tolerance import compile_spec
+
+# d2 constant for moving ranges of two consecutive points
+D2 = 1.128
+
+
+def summarize(stats):
+    """Turn a spc_stats row into a dict of mean, sigmas, control limits and Cp/Cpk (None where undefined).
+
+    The short-term sigma comes from the average moving range (MR bar / d2), as on an
+    individuals chart; Cp needs both specification limits, Cpk needs at least one.
+    """
+    fixture_number, accessory_number, parameter, specification, n, mean, m2, mr_sum, mr_count = stats
+    stdev = math.sqrt(m2 / (n - 1)) if n > 1 else None
+    mr_bar = mr_sum / mr_count if mr_count else None
+    sigma = mr_bar / D2 if mr_bar else None
+    low, high = compile_spec(specification)
+    lsl = low if math.isfinite(low) else None
+    usl = high if math.isfinite(high) else None
+    cp = cpk = None
+    if sigma:
+        if lsl is not None and usl is not None:
+            cp = (usl - lsl) / (6 * sigma)
+        sides = [limit for limit in ((usl - mean) if usl is not None else None,
+                                     (mean - lsl) if lsl is not None else None) if limit is not None]
+        if sides:
+            cpk = min(sides) / (3 * sigma)
+    return {
+        "fixture": fixture_number, "accessory": accessory_number, "parameter": parameter,
+        "specification": specification, "n": n, "mean": mean, "stdev": stdev, "mr_bar": mr_bar,
+        "sigma": sigma, "lsl": lsl, "usl": usl, "cp": cp, "cpk": cpk,
+        "ucl": mean + 3 * sigma if sigma else None, "lcl": mean - 3 * sigma if sigma else None,
+    }
+
+
+def format_number(value, digits=4):
+    """Format an optional statistic for tables."""
+    return "" if value is None else f"{value:.{digits}g}"
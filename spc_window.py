@@ -0,0 +1,81 @@
+import tkinter as tk
+from tkinter import ttk
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+import inspection_store
+import spc
+
+SUMMARY_COLUMNS = ["Accessory No.", "Parameter", "Specification", "n", "Mean", "Std Dev", "MR Bar", "Cp", "Cpk"]
+
+
+def open_spc_window(root, store, fixture_number):
+    """Open the SPC summary of a fixture's parameters with an individuals control chart of the selected one.
+
+    Everything shown comes from the running statistics and the latest points kept by the store,
+    so opening the window or switching parameters never reads the inspection history.
+    """
+    window = tk.Toplevel(root)
+    window.title(f"SPC - Fixture {fixture_number}")
+
+    tree = ttk.Treeview(window, columns=SUMMARY_COLUMNS, show="headings", height=8)
+    for col in SUMMARY_COLUMNS:
+        tree.heading(col, text=col)
+        tree.column(col, width=90, anchor='center')
+    tree.grid(row=0, column=0, padx=10, pady=10, sticky='nsew')
+
+    figure = Figure(figsize=(8, 4), dpi=100)
+    axes = figure.add_subplot(111)
+    canvas = FigureCanvasTkAgg(figure, master=window)
+    canvas.get_tk_widget().grid(row=1, column=0, padx=10, pady=10, sticky='nsew')
+    window.columnconfigure(0, weight=1)
+    window.rowconfigure(1, weight=1)
+
+    summaries = {}
+
+    def load_summary():
+        """Fill the table from the running statistics."""
+        tree.delete(*tree.get_children())
+        summaries.clear()
+        for stats in inspection_store.spc_stats(store, fixture_number):
+            summary = spc.summarize(stats)
+            item = tree.insert("", tk.END, values=(
+                summary["accessory"], summary["parameter"], summary["specification"], summary["n"],
+                spc.format_number(summary["mean"]), spc.format_number(summary["stdev"]),
+                spc.format_number(summary["mr_bar"]),
+                spc.format_number(summary["cp"], 3), spc.format_number(summary["cpk"], 3),
+            ))
+            summaries[item] = summary
+
+    def show_chart(event=None):
+        """Draw the individuals chart of the selected parameter."""
+        selected = tree.selection()
+        if not selected:
+            return
+        summary = summaries[selected[0]]
+        points = inspection_store.spc_points(store, fixture_number, summary["accessory"], summary["parameter"])
+        axes.clear()
+        axes.plot(range(len(points)), [value for _, value in points], marker='o', markersize=3, label="Observation")
+        for name, value, style in (("CL", summary["mean"], '-'), ("UCL", summary["ucl"], '--'),
+                                   ("LCL", summary["lcl"], '--'), ("USL", summary["usl"], ':'),
+                                   ("LSL", summary["lsl"], ':')):
+            if value is not None:
+                axes.axhline(value, linestyle=style, linewidth=1, label=f"{name} {value:.4g}")
+        if summary["ucl"] is not None:
+            outside = [(index, value) for index, (_, value) in enumerate(points)
+                       if not summary["lcl"] <= value <= summary["ucl"]]
+            if outside:
+                axes.plot(*zip(*outside), linestyle='', marker='o', color='red', label="Out of control")
+        step = max(len(points) // 10, 1)
+        axes.set_xticks(range(0, len(points), step))
+        axes.set_xticklabels([points[index][0] for index in range(0, len(points), step)], rotation=45, ha='right')
+        axes.set_title(f"{summary['accessory']} {summary['parameter']} (Cpk {spc.format_number(summary['cpk'], 3) or 'n/a'})")
+        axes.legend(fontsize='small')
+        figure.tight_layout()
+        canvas.draw_idle()
+
+    tree.bind('<<TreeviewSelect>>', show_chart)
+    tk.Button(window, text="Refresh", command=load_summary).grid(row=2, column=0, pady=10)
+    load_summary()
+    return window
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import inspection_store
+from bulk_ingest import expand_paths
+
+# Below this many unread bytes the files are parsed in this process, as starting workers costs more
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def parse_station_file(job):
+    """Parse the unread tail of one station file; runs in a worker process.
+
+    job is (filepath, recorded, offset); returns (filepath, recorded, [(rows, end_offset), ...]).
+    """
+    filepath, recorded, offset = job
+    return filepath, recorded, list(inspection_store.read_source(filepath, offset))
+
+
+def changed_files(conn, paths):
+    """Return (filepath, recorded, offset, unread bytes) for the station files with data not yet in the store.
+
+    The store keeps the offset each file was parsed up to, so a file whose size still matches
+    it is not opened at all; a shorter file was replaced and is read again from the start.
+    """
+    changed = []
+    for filepath in paths:
+        filepath = os.path.abspath(filepath)
+        if not os.path.isfile(filepath):
+            continue
+        recorded, offset = inspection_store.source_offset(conn, filepath)
+        unread = os.path.getsize(filepath) - offset
+        if unread > 0:
+            changed.append((filepath, recorded, offset, unread))
+    return changed
+
+
+def load_stations(conn, paths=None, workers=None):
+    """Merge the new rows of station CSV files into the store and return how many were added.
+
+    paths are files, directories or glob patterns; None means every file loaded before. Changed
+    files are parsed concurrently in a process pool, while this process stays the only writer
+    and stores each file's rows, labelled with their Source, as soon as they are parsed.
+    """
+    if paths is None:
+        files = [path for (path,) in conn.execute("SELECT path FROM csv_sources ORDER BY path")]
+    else:
+        files = expand_paths(paths)
+    changed = changed_files(conn, files)
+    jobs = [job[:3] for job in changed]
+    if len(jobs) < 2 or sum(job[3] for job in changed) < PARALLEL_MIN_BYTES:
+        return sum(_store(conn, *parse_station_file(job)) for job in jobs)
+    loaded = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(parse_station_file, job) for job in jobs]):
+            loaded += _store(conn, *future.result())
+    return loaded
+
+
+def _store(conn, filepath, recorded, chunks):
+    """Store the parsed chunks of one file, committing its offset after each.
+
+    Stops at the first chunk another connection stored while this one was parsing.
+    """
+    loaded = 0
+    for rows, end_offset in chunks:
+        if not inspection_store.store_source_rows(conn, filepath, rows, recorded, end_offset):
+            break
+        loaded += len(rows)
+        recorded = end_offset
+    return loaded
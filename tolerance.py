@@ -0,0 +1,97 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+NUMBER = r"\d+(?:\.\d+)?|\.\d+"
+SIGNED = rf"[-+]?\s*(?:{NUMBER})"
+# Slack for values written exactly on a limit, which float arithmetic can push just outside it
+EPSILON = 1e-9
+
+SYMMETRIC = re.compile(rf"^({SIGNED})\s*(?:±|\+/-|\+-)\s*({NUMBER})$")
+DEVIATIONS = re.compile(rf"^({SIGNED})\s*([-+]\s*(?:{NUMBER}))(?:\s*/\s*|\s+|(?=[-+]))({SIGNED})$")
+UPPER_LIMIT = re.compile(rf"^(?:max\.?|maximum|up\s*to|<=|≤|<)\s*({SIGNED})$|^({SIGNED})\s*(?:max\.?|maximum)$")
+LOWER_LIMIT = re.compile(rf"^(?:min\.?|minimum|>=|≥|>)\s*({SIGNED})$|^({SIGNED})\s*(?:min\.?|minimum)$")
+RANGE = re.compile(rf"^({SIGNED})\s*(?:to|~|-|–)\s*({NUMBER})$")
+
+
+def _number(text):
+    """Parse a number that may have spaces after its sign."""
+    return float(text.replace(" ", ""))
+
+
+@lru_cache(maxsize=4096)
+def compile_spec(specification):
+    """Compile a specification into inclusive (low, high) bounds, with -inf/inf for open ends.
+
+    Understands forms such as '10±0.05', 'Ø12 +0.02/-0.01', 'max 0.5', 'min 2' and '10 to 12';
+    returns (nan, nan) when the text is not a numeric specification.
+    """
+    text = str(specification).strip().lower()
+    for prefix in ("ø", "⌀", "dia.", "dia", "r"):
+        if text.startswith(prefix):
+            text = text[len(prefix):].strip()
+            break
+    text = re.sub(r"\s*(?:mm|µm|um|°)\s*", " ", text).strip()
+
+    found = SYMMETRIC.match(text)
+    if found:
+        nominal, tolerance = _number(found.group(1)), _number(found.group(2))
+        return nominal - tolerance, nominal + tolerance
+    found = DEVIATIONS.match(text)
+    if found:
+        nominal, first = _number(found.group(1)), _number(found.group(2))
+        second_text = found.group(3).replace(" ", "")
+        second = _number(second_text)
+        if second_text[0] not in "+-":
+            # '+0.02/0.01' lists the upper then the lower deviation, so an unsigned one takes the other side
+            second = -second if first > 0 else second
+        return nominal + min(first, second), nominal + max(first, second)
+    found = UPPER_LIMIT.match(text)
+    if found:
+        return -np.inf, _number(found.group(1) or found.group(2))
+    found = LOWER_LIMIT.match(text)
+    if found:
+        return _number(found.group(1) or found.group(2)), np.inf
+    found = RANGE.match(text)
+    if found:
+        low, high = _number(found.group(1)), _number(found.group(2))
+        return min(low, high), max(low, high)
+    return np.nan, np.nan
+
+
+def _to_float(value):
+    """Parse one observation, or nan when it is not a number."""
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return np.nan
+
+
+def bounds(specifications):
+    """Return (low, high) arrays for a sequence of specifications, compiling each distinct one once."""
+    unique, inverse = np.unique(np.asarray(specifications, dtype=str), return_inverse=True)
+    compiled = np.array([compile_spec(spec) for spec in unique], dtype=float).reshape(-1, 2)
+    return compiled[inverse, 0], compiled[inverse, 1]
+
+
+def numbers(observations):
+    """Return observations as a float array, nan where a value is not numeric."""
+    unique, inverse = np.unique(np.asarray(observations, dtype=str), return_inverse=True)
+    return np.array([_to_float(value) for value in unique], dtype=float)[inverse]
+
+
+def evaluate(observations, specifications):
+    """Return an array of 'OK', 'NG' or '' (cannot judge) for paired observations and specifications."""
+    if len(observations) == 0:
+        return np.array([], dtype=str)
+    low, high = bounds(specifications)
+    values = numbers(observations)
+    known = ~np.isnan(low) & ~np.isnan(values)
+    within = (values >= low - EPSILON) & (values <= high + EPSILON)
+    return np.where(known, np.where(within, "OK", "NG"), "")
+
+
+def evaluate_one(observation, specification):
+    """Return 'OK', 'NG' or '' for a single observation."""
+    return str(evaluate([observation], [specification])[0])
@@ -0,0 +1,113 @@
+import queue
+import threading
+
+import inspection_store
+
+POLL_INTERVAL_MS = 50
+
+
+class QueryCancelled(Exception):
+    """Raised inside a view task when a newer query has superseded it."""
+
+
+class CancelToken:
+    """Cancellation flag handed to a view task, which calls check() at convenient points."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def check(self):
+        """Stop the task when it has been superseded."""
+        if self.cancelled:
+            raise QueryCancelled()
+
+
+class ViewQueryExecutor:
+    """Run the viewer's queries on a background thread, keeping only the latest one.
+
+    Submitting a query cancels the one running and drops any still waiting, so rapid
+    filter clicks never queue up stale work. The worker has its own store connection,
+    since SQLite connections stay on the thread that opened them. Results reach their
+    callbacks on the Tk thread via after(), and a query counts as busy until its result
+    has been delivered.
+    """
+
+    def __init__(self, store_path=inspection_store.STORE_PATH):
+        self.store_path = store_path
+        self.condition = threading.Condition()
+        self.pending = None
+        self.running = None
+        self.closed = False
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="view-query", daemon=True)
+        self.thread.start()
+
+    def submit(self, task, on_done):
+        """Queue task(store, token) in place of any earlier query; on_done(result, error) runs on the Tk thread."""
+        token = CancelToken()
+        with self.condition:
+            for earlier in (self.pending, self.running):
+                if earlier is not None:
+                    earlier[1].cancelled = True
+            self.pending = (task, token, on_done)
+            self.condition.notify()
+        return token
+
+    def busy(self):
+        """Return True while a query is waiting or running."""
+        with self.condition:
+            return self.pending is not None or self.running is not None
+
+    def poll(self, root, on_busy=None):
+        """Deliver finished queries, report whether work is in flight and reschedule on the Tk event loop."""
+        while True:
+            try:
+                token, on_done, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if not token.cancelled:
+                on_done(result, error)
+            with self.condition:
+                # Only now is the query finished for busy(); a newer one may already be running
+                if self.running is not None and self.running[1] is token:
+                    self.running = None
+        if on_busy is not None:
+            on_busy(self.busy())
+        if root.winfo_exists():
+            root.after(POLL_INTERVAL_MS, self.poll, root, on_busy)
+
+    def close(self):
+        """Cancel outstanding work and stop the background thread."""
+        with self.condition:
+            for earlier in (self.pending, self.running):
+                if earlier is not None:
+                    earlier[1].cancelled = True
+            self.pending = None
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def _run(self):
+        """Run the latest submitted query until closed."""
+        store = None
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    break
+                self.running = self.pending
+                self.pending = None
+            task, token, on_done = self.running
+            try:
+                if store is None:
+                    store = inspection_store.open_store(self.store_path)
+                result, error = task(store, token), None
+            except QueryCancelled:
+                result = error = None
+            except Exception as e:
+                result, error = None, e
+            # running stays set until poll() hands the result over, so busy() also covers the hand-off
+            self.results.put((token, on_done, result, error))
+        if store is not None:
+            store.close()
@@ -0,0 +1,94 @@
+import tkinter as tk
+
+# Rows fetched from the result set at a time; scrolling within a page does not touch the source
+PAGE_ROWS = 200
+WHEEL_ROWS = 3
+
+
+class VirtualTreeview:
+    """Shows a window of a large row sequence in a ttk.Treeview.
+
+    The Treeview only ever holds as many items as it has visible lines. Scrolling moves an
+    offset into the sequence and rewrites those items in place, so a result of any size costs
+    the same as one screenful. The scrollbar is driven from the offset, and rows are read
+    from the sequence (anything with len() and integer indexing) a page at a time.
+    """
+
+    def __init__(self, tree, scrollbar, count_label=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.count_label = count_label
+        self.rows = []
+        self.offset = 0
+        self.page_start = 0
+        self.page = []
+        scrollbar.configure(command=self.yview)
+        tree.configure(yscrollcommand="")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel)
+        tree.bind("<Prior>", lambda event: self.yview("scroll", -1, "pages"))
+        tree.bind("<Next>", lambda event: self.yview("scroll", 1, "pages"))
+
+    def visible_rows(self):
+        """Return how many rows the Treeview shows at once."""
+        return max(int(self.tree.cget("height")), 1)
+
+    def set_rows(self, rows):
+        """Show a new row sequence from the top."""
+        self.rows = rows
+        self.offset = 0
+        self.page = []
+        self.render()
+
+    def refresh(self):
+        """Redraw after the current sequence grew or changed, keeping the scroll position."""
+        self.page = []
+        self.render()
+
+    def _fetch(self, index):
+        """Return one row, reading the page around it from the sequence when it is not buffered."""
+        if not self.page_start <= index < self.page_start + len(self.page):
+            self.page_start = index - index % PAGE_ROWS
+            stop = min(self.page_start + PAGE_ROWS, len(self.rows))
+            self.page = [self.rows[i] for i in range(self.page_start, stop)]
+        return self.page[index - self.page_start]
+
+    def render(self):
+        """Fill the Treeview items with the rows at the current offset and update the indicators."""
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - self.visible_rows()))
+        stop = min(self.offset + self.visible_rows(), total)
+        items = self.tree.get_children()
+        shown = stop - self.offset
+        if len(items) > shown:
+            self.tree.delete(*items[shown:])
+        for position in range(shown):
+            values = self._fetch(self.offset + position)
+            if position < len(items):
+                self.tree.item(items[position], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+        if total:
+            self.scrollbar.set(self.offset / total, stop / total)
+        else:
+            self.scrollbar.set(0, 1)
+        if self.count_label is not None:
+            self.count_label.config(text=f"Rows {self.offset + 1:,}-{stop:,} of {total:,}" if total else "No rows")
+
+    def yview(self, *args):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'."""
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = self.visible_rows() if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self.render()
+
+    def _on_wheel(self, event):
+        """Scroll a few rows per mouse wheel notch (delta on Windows/macOS, buttons 4/5 on X11)."""
+        if event.num == 4 or event.delta > 0:
+            self.offset -= WHEEL_ROWS
+        else:
+            self.offset += WHEEL_ROWS
+        self.render()
+        return "break"